@@ -0,0 +1,9 @@
+# Player action codes used by strategy tables and simulators
+STAND = 0
+HIT = 1
+SPLIT = 2
+DOUBLE = 3
+SURRENDER = 4
+INSURANCE = 5  # A side bet taken before play, never held in a strategy table
+
+ACTION_NAMES = ('stand', 'hit', 'split', 'double', 'surrender', 'insurance')
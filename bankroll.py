@@ -0,0 +1,191 @@
+import numpy as np
+from batch_simulator import BatchSimulator, dealShoes
+from rules import DEFAULT_RULES
+
+
+class OutcomeDistribution:
+    """Distribution of a round's net winnings per unit bet, e.g. +1 for a win,
+       0 for a push and -1 for a loss.
+
+    Args:
+        values (array of float): each possible net winnings per unit bet.
+        probabilities (array of float): probability of each value.
+    """
+
+    def __init__(self, values, probabilities):
+        self.values = np.asarray(values, dtype=np.float64)
+        probabilities = np.asarray(probabilities, dtype=np.float64)
+        self.probabilities = probabilities / probabilities.sum()
+        self._cumulative = np.cumsum(self.probabilities)
+        self._cumulative[-1] = 1.0
+
+    @classmethod
+    def fromSamples(cls, winnings):
+        """Distribution of observed winnings per unit bet, e.g. from a simulation."""
+        values, counts = np.unique(np.asarray(winnings), return_counts=True)
+        return cls(values, counts)
+
+    @classmethod
+    def fromWinDrawLose(cls, win, draw, lose, natural=0.0, payout=1.5):
+        """Distribution from outcome probabilities, with naturals paid at payout."""
+        return cls([payout, 1.0, 0.0, -1.0], [natural, win, draw, lose])
+
+    @classmethod
+    def fromBatchSimulation(cls, strategy=None, rounds=1000000, rng=None, rules=DEFAULT_RULES):
+        """Distribution of a strategy's winnings per unit bet, simulated with
+           BatchSimulator at the rules' bet unit so every payout is exact."""
+        if rng is None:
+            rng = np.random.default_rng()
+        simulator = BatchSimulator(strategy, rules=rules)
+        winnings = simulator.play(dealShoes(rounds, rng=rng))['winnings']
+        return cls.fromSamples(winnings / simulator.bet)
+
+    @property
+    def mean(self):
+        return float(self.values @ self.probabilities)
+
+    @property
+    def std(self):
+        return float(np.sqrt(np.square(self.values - self.mean) @ self.probabilities))
+
+    def sample(self, size, rng):
+        """Draws outcomes by inverse transform sampling.
+
+        Args:
+            size (int or tuple of int): shape of the outcomes drawn.
+            rng (numpy Generator): random number generator to draw with.
+
+        Returns:
+            numpy array of float32: net winnings per unit bet.
+        """
+        uniform = rng.random(size, dtype=np.float32)
+        values = self.values.astype(np.float32)
+        if len(values) > 8:
+            return values[np.searchsorted(self._cumulative, uniform, side='right')]
+        # A few comparisons against the cumulative probabilities beat a binary search
+        index = np.zeros(size, dtype=np.uint8)
+        for threshold in self._cumulative[:-1].astype(np.float32):
+            index += uniform >= threshold
+        return values[index]
+
+
+def firstTrue(mask, default):
+    """Index of the first True in each row of a mask, or default if none."""
+    return np.where(mask.any(axis=1), mask.argmax(axis=1), default)
+
+
+class BankrollSimulator:
+    """Simulates many bankroll trajectories at once as NumPy arrays. Each path
+       stops when the bankroll can no longer cover the minimum bet (ruin) or
+       reaches the target.
+
+    Args:
+        outcomes (OutcomeDistribution): net winnings per unit bet of a round.
+        bankroll (float): starting bankroll.
+        bet (float, optional): flat bet each round, and the smallest bet the
+                               table allows. Defaults to 1.
+        fraction (float, optional): bet this fraction of the current bankroll
+                                    each round (proportional betting) instead
+                                    of a flat bet. Defaults to None, flat betting.
+        target (float, optional): bankroll at which a path stops as a success.
+                                  Defaults to double the starting bankroll.
+    """
+
+    def __init__(self, outcomes, bankroll, bet=1, fraction=None, target=None):
+        self.outcomes = outcomes
+        self.bankroll = bankroll
+        self.bet = bet
+        self.fraction = fraction
+        self.target = 2 * bankroll if target is None else target
+
+    def paths(self, no_paths, rounds, rng):
+        """Bankroll after each round of each path, before stopping.
+
+        Returns:
+            numpy array (no_paths, rounds + 1): bankroll trajectories, starting
+                                                with the starting bankroll.
+        """
+        outcomes = self.outcomes.sample((no_paths, rounds), rng)
+        paths = np.empty((no_paths, rounds + 1), dtype=np.float32)
+        paths[:, 0] = self.bankroll
+        if self.fraction is None:
+            np.cumsum(outcomes * self.bet, axis=1, out=paths[:, 1:])
+            paths[:, 1:] += self.bankroll
+        else:
+            np.cumprod(1 + self.fraction * outcomes, axis=1, out=paths[:, 1:])
+            paths[:, 1:] *= self.bankroll
+        return paths
+
+    def analyse(self, paths):
+        """Stopping times and drawdowns of bankroll trajectories.
+
+        Returns:
+            dict of numpy arrays: round each path was ruined or reached the
+                                  target (rounds + 1 if never), its largest
+                                  drawdown as a fraction of the peak bankroll
+                                  before stopping and its final bankroll.
+        """
+        rounds = paths.shape[1] - 1
+        ruin_time = firstTrue(paths < self.bet, rounds + 1)
+        target_time = firstTrue(paths >= self.target, rounds + 1)
+        stop_time = np.minimum(np.minimum(ruin_time, target_time), rounds)
+
+        # Hold each path at its value once it stops
+        stopped = np.arange(rounds + 1) > stop_time[:, None]
+        final = np.take_along_axis(paths, stop_time[:, None], axis=1)
+        paths = np.where(stopped, final, paths)
+
+        peaks = np.maximum.accumulate(paths, axis=1)
+        drawdown = ((peaks - paths) / peaks).max(axis=1)
+        return {'ruin_time': np.where(ruin_time < target_time, ruin_time, rounds + 1),
+                'target_time': np.where(target_time < ruin_time, target_time, rounds + 1),
+                'max_drawdown': drawdown, 'final': final[:, 0]}
+
+    def simulate(self, no_paths, rounds, rng=None, chunk_size=None):
+        """Simulates bankroll paths in chunks and summarises them.
+
+        Args:
+            no_paths (int): number of trajectories.
+            rounds (int): most rounds played on each trajectory.
+            rng (numpy Generator, optional): random number generator.
+            chunk_size (int, optional): paths held in memory at once. Defaults
+                                        to about 8MB of paths, which stays
+                                        cache friendly.
+
+        Returns:
+            dict: risk of ruin and the rate of reaching the target within the
+                  rounds played, percentiles (50, 90, 99) of the rounds taken to
+                  be ruined or reach the target among paths that did, of the
+                  largest drawdown and of the final bankroll.
+        """
+        if rng is None:
+            rng = np.random.default_rng()
+        if chunk_size is None:
+            chunk_size = max(1, 2000000 // (rounds + 1))
+
+        results = {'ruin_time': [], 'target_time': [], 'max_drawdown': [], 'final': []}
+        for start in range(0, no_paths, chunk_size):
+            chunk = self.analyse(self.paths(min(chunk_size, no_paths - start), rounds, rng))
+            for name, values in chunk.items():
+                results[name].append(values)
+        results = {name: np.concatenate(values) for name, values in results.items()}
+
+        percentiles = (50, 90, 99)
+
+        def timePercentiles(times):
+            times = times[times <= rounds]
+            if not len(times):
+                return None
+            return dict(zip(percentiles, np.percentile(times, percentiles).tolist()))
+
+        return {'paths': no_paths, 'rounds': rounds,
+                'risk_of_ruin': float(np.mean(results['ruin_time'] <= rounds)),
+                'target_rate': float(np.mean(results['target_time'] <= rounds)),
+                'time_to_ruin': timePercentiles(results['ruin_time']),
+                'time_to_target': timePercentiles(results['target_time']),
+                'max_drawdown': dict(zip(percentiles,
+                                         np.percentile(results['max_drawdown'],
+                                                       percentiles).tolist())),
+                'final_bankroll': dict(zip(percentiles,
+                                           np.percentile(results['final'],
+                                                         percentiles).tolist()))}
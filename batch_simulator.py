@@ -0,0 +1,224 @@
+import numpy as np
+from actions import STAND, HIT, DOUBLE, SURRENDER
+from hand import CARD_VALUES
+from rules import DEFAULT_RULES
+from settlement import settle
+
+
+# Value of each rank 2-10, J, Q, K, A. An Ace is held as 1 and counted as 11
+# whenever that does not bust the hand (a soft hand).
+RANK_VALUES = CARD_VALUES[::4].astype(np.int8)
+
+
+def dealShoes(no_tables, no_cards=24, rng=None):
+    """Deals a row of random card values for each table from an infinite deck.
+
+    Args:
+        no_tables (int): number of tables (rows) to deal.
+        no_cards (int, optional): cards dealt to each table. Must cover the
+                                  longest possible round. Defaults to 24.
+        rng (numpy Generator, optional): random number generator to draw with.
+
+    Returns:
+        numpy array (no_tables, no_cards): the card values of each table's shoe
+                                           in dealing order.
+    """
+    if rng is None:
+        rng = np.random.default_rng()
+    return RANK_VALUES[rng.integers(len(RANK_VALUES), size=(no_tables, no_cards))]
+
+
+def mimicDealerTable():
+    """Strategy table that hits below 17 and stands otherwise, like the dealer.
+
+    Returns:
+        numpy array (2, 22, 11): action indexed by [soft, best total, dealer upcard].
+    """
+    table = np.full((2, 22, 11), STAND, dtype=np.uint8)
+    table[:, :17, :] = HIT
+    return table
+
+
+def basicStrategyTable():
+    """Hit/stand basic strategy for a game without doubling or splitting.
+
+    Returns:
+        numpy array (2, 22, 11): action indexed by [soft, best total, dealer upcard],
+                                 where an upcard Ace has value 1.
+    """
+    table = np.full((2, 22, 11), STAND, dtype=np.uint8)
+    # Hard totals
+    table[0, :12, :] = HIT
+    table[0, 12, [1, 2, 3, 7, 8, 9, 10]] = HIT
+    table[0, 13:17, 1] = HIT
+    table[0, 13:17, 7:] = HIT
+    # Soft totals
+    table[1, :18, :] = HIT
+    table[1, 18, [1, 9, 10]] = HIT
+    return table
+
+
+def bestTotals(hard, soft_ace):
+    """Best total of each hand, counting one Ace as 11 if it does not bust."""
+    return np.where(soft_ace & (hard <= 11), hard + 10, hard)
+
+
+class BatchSimulator:
+    """Plays one single-player round on each of N independent tables in
+       lock-step, holding every hand's state as NumPy arrays.
+
+       The rules and dealing order match the object engine (HeadlessBlackjack):
+       the dealer takes one card, the player two, the player acts by the
+       strategy table and, unless the player has bust or surrendered, the
+       dealer draws by the rule set's dealer table. Hands are settled by the
+       same settlement engine. Pairs are never split.
+
+    Args:
+        strategy (numpy array, StrategyTable or TablePolicy, optional): action
+            table indexed [soft, best total, upcard], or a solved strategy whose
+            two card actions may also double or surrender. Defaults to
+            basicStrategyTable.
+        bet (int, optional): bet on every table, a multiple of the rules'
+                             bet_unit. Defaults to the bet_unit.
+        rules (RuleSet, optional): the rules played by. Defaults to the default
+                                   rules, see rules.py.
+    """
+
+    def __init__(self, strategy=None, bet=None, rules=DEFAULT_RULES):
+        if bet is None:
+            bet = rules.bet_unit
+        elif not rules.payable(bet):
+            raise ValueError(f'Bet {bet} is not a multiple of the bet unit {rules.bet_unit}.')
+        self.two_card_actions = None
+        if strategy is None:
+            strategy = basicStrategyTable()
+        elif not isinstance(strategy, np.ndarray):
+            # A StrategyTable or TablePolicy
+            self.two_card_actions = strategy.two_card_actions
+            strategy = strategy.actions
+        self.strategy = strategy
+        self.bet = bet
+        self.rules = rules
+
+    def play(self, shoes):
+        """Plays one round on every table.
+
+        Args:
+            shoes (numpy array (N, no_cards)): card values for each table in
+                                               dealing order, Aces valued 1.
+
+        Returns:
+            dict of numpy arrays: player and dealer final totals, bust masks,
+                                  bets and the net winnings of each table.
+        """
+        no_tables = len(shoes)
+        rows = np.arange(no_tables)
+        cursor = np.zeros(no_tables, dtype=np.intp)
+
+        def deal(mask):
+            # Draw the next card on masked tables, others receive nothing
+            cards = shoes[rows, cursor]
+            cursor[mask] += 1
+            return np.where(mask, cards, 0)
+
+        everyone = np.ones(no_tables, dtype=bool)
+
+        # Dealer init
+        upcard = deal(everyone)
+        dealer_hard = upcard.astype(np.int16)
+        dealer_ace = upcard == 1
+
+        # Player init
+        player_hard = np.zeros(no_tables, dtype=np.int16)
+        player_ace = np.zeros(no_tables, dtype=bool)
+        for _ in range(2):
+            card = deal(everyone)
+            player_hard += card
+            player_ace |= card == 1
+        player_natural = bestTotals(player_hard, player_ace) == 21
+        bets = np.full(no_tables, self.bet, dtype=np.int64)
+
+        # The first decision may double or surrender where the rules allow
+        soft = (player_ace & (player_hard <= 11)).astype(np.intp)
+        total = bestTotals(player_hard, player_ace)
+        surrendered = np.zeros(no_tables, dtype=bool)
+        doubling = np.zeros(no_tables, dtype=bool)
+        if self.two_card_actions is not None:
+            action = self.two_card_actions[soft, total, upcard]
+            doubling = (action == DOUBLE) & self.rules.double_table[0, soft, total]
+            surrendered = (action == SURRENDER) & self.rules.surrender
+            bets[doubling] *= 2
+
+        # Player plays by masked lookup into the strategy table
+        active = ~surrendered
+        while active.any():
+            soft = player_ace & (player_hard <= 11)
+            total = bestTotals(player_hard, player_ace)
+            action = self.strategy[soft.astype(np.intp), np.minimum(total, 21), upcard]
+            hitting = active & ((action == HIT) | doubling)
+            card = deal(hitting)
+            player_hard += card
+            player_ace |= card == 1
+            # A double receives one card only
+            active = hitting & ~doubling & (player_hard <= 21)
+            doubling[:] = False
+        player_bust = player_hard > 21
+        player_total = bestTotals(player_hard, player_ace)
+
+        # Dealer draws by the rules on every table where the player stands
+        draw_table = self.rules.dealer_draw_table
+
+        def dealerDraws():
+            soft = (dealer_ace & (dealer_hard <= 11)).astype(np.intp)
+            return draw_table[soft, bestTotals(dealer_hard, dealer_ace)]
+
+        drawing = ~player_bust & ~surrendered & dealerDraws()
+        dealer_cards = np.ones(no_tables, dtype=np.int8)
+        while drawing.any():
+            card = deal(drawing)
+            dealer_hard += card
+            dealer_ace |= card == 1
+            dealer_cards += drawing
+            drawing &= dealerDraws()
+        dealer_bust = dealer_hard > 21
+        dealer_total = bestTotals(dealer_hard, dealer_ace)
+
+        dealer_natural = (dealer_cards == 2) & (dealer_total == 21)
+
+        # Settle
+        payouts, _ = settle(player_total, player_bust, player_natural, bets, dealer_total,
+                            dealer_bust, dealer_natural, self.rules.blackjack_payout,
+                            surrendered)
+        winnings = payouts - bets
+
+        return {'player_total': player_total, 'player_bust': player_bust,
+                'dealer_total': dealer_total, 'dealer_bust': dealer_bust,
+                'bets': bets, 'winnings': winnings}
+
+    def simulate(self, rounds, batch_size=100000, rng=None):
+        """Plays rounds in batches on freshly dealt infinite-deck shoes.
+
+        Args:
+            rounds (int): total number of rounds to play.
+            batch_size (int, optional): tables played per lock-step batch.
+                                        Defaults to 100000.
+            rng (numpy Generator, optional): random number generator to deal with.
+
+        Returns:
+            dict: rounds played, expected value per unit bet, standard deviation
+                  of the winnings per round and the standard error of the EV.
+        """
+        if rng is None:
+            rng = np.random.default_rng()
+        total = 0.0
+        total_sq = 0.0
+        played = 0
+        while played < rounds:
+            size = min(batch_size, rounds - played)
+            winnings = self.play(dealShoes(size, rng=rng))['winnings'] / self.bet
+            total += winnings.sum()
+            total_sq += np.square(winnings).sum()
+            played += size
+        ev = float(total / played)
+        std = float(np.sqrt(max(total_sq / played - ev**2, 0)))
+        return {'rounds': played, 'ev': ev, 'std': std, 'std_error': std / played**0.5}
@@ -0,0 +1,189 @@
+import argparse
+import json
+import os
+import statistics
+import time
+import numpy as np
+from cli_blackjack import Blackjack
+from hand import Shoe, Hand, RANKS, SUITS
+from headless_blackjack import HeadlessBlackjack
+
+
+# Every benchmark is a function taking a seeded random number generator and
+# returning (callable, operations per call), so runs are repeatable.
+
+def benchDeckDraw(rng):
+    deck = Shoe(6, 1.0, rng)
+    draws = len(deck)
+
+    def run():
+        deck.refillDeck()
+        for _ in range(draws):
+            deck.draw()
+    return run, draws
+
+
+def benchRefillDeck(rng):
+    deck = Shoe(6, 0.75, rng)
+    return deck.refillDeck, 1
+
+
+def benchHandValue(rng):
+    # Ace heavy hands, where the soft total has to be tracked
+    aces = [RANKS.index('A')*4 + suit for suit in range(len(SUITS))]  # Encoded Aces
+    hands = [list(rng.choice(aces, 3)) + list(rng.integers(0, 52, 2)) for _ in range(100)]
+    cards = sum(len(hand) for hand in hands)
+
+    def run():
+        for cards_in_hand in hands:
+            hand = Hand()
+            for card in cards_in_hand:
+                hand.addToHandValue(card)
+            hand.hand_value.best
+    return run, cards
+
+
+def benchCalcBust(rng):
+    game = Blackjack(verbose=False, rng=rng)
+    game.personDraws(dealer=True, times=2)
+    game.personDraws(player_id=0, times=3)
+
+    def run():
+        for _ in range(100):
+            game.calcBust(player_id=0)
+            game.dealerContinueDraw()
+    return run, 100
+
+
+def benchHeadlessRound(rng):
+    game = HeadlessBlackjack(1, player_bank=10**9, rng=rng)
+
+    def run():
+        for _ in range(100):
+            game.playRound(game.rules.bet_unit)
+    return run, 100
+
+
+def benchGUIFrame(rng):
+    """Full frames of the GUI, drawn with the SDL dummy driver."""
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+    from blackjack import GUIBlackjack
+
+    game = GUIBlackjack()
+    game.verbose = False
+    game.deck = Shoe(6, 0.75, rng)
+    game.game_status = game.default_game_status
+    game.personDraws(dealer=True)
+    game.personDraws(times=2)
+
+    def run():
+        game.redraw_all = True  # Every region is drawn
+        game.display()
+    return run, 1
+
+
+BENCHMARKS = {
+    'deck_draw': benchDeckDraw,
+    'refill_deck': benchRefillDeck,
+    'hand_value': benchHandValue,
+    'calc_bust': benchCalcBust,
+    'headless_round': benchHeadlessRound,
+    'gui_frame': benchGUIFrame,
+}
+
+
+def runBenchmark(benchmark, repeat=7, min_time=0.1, seed=0):
+    """Times a benchmark, calling it enough times for each repeat to take at
+       least min_time.
+
+    Args:
+        benchmark (function): one of BENCHMARKS.
+        repeat (int, optional): number of timed repeats. Defaults to 7.
+        min_time (float, optional): least seconds per repeat. Defaults to 0.1.
+        seed (int, optional): seed for the benchmark's random number generator.
+                              Defaults to 0.
+
+    Returns:
+        dict: mean and standard deviation of operations per second over the
+              repeats, and the calls made per repeat.
+    """
+    run, ops = benchmark(np.random.default_rng(seed))
+    run()  # Warm up
+
+    # Find how many calls take at least min_time
+    calls = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(calls):
+            run()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            break
+        calls *= 2
+
+    rates = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(calls):
+            run()
+        rates.append(calls * ops / (time.perf_counter() - start))
+    return {'ops_per_sec': statistics.mean(rates), 'stdev': statistics.stdev(rates),
+            'calls': calls}
+
+
+def compareResults(results, baseline, threshold=0.1):
+    """Finds benchmarks that have slowed down compared to a baseline.
+
+    Args:
+        results (dict): benchmark results by name, from runBenchmark.
+        baseline (dict): earlier results in the same format.
+        threshold (float, optional): fraction of the baseline ops/sec that
+                                     may be lost before it counts as a
+                                     regression. Defaults to 0.1.
+
+    Returns:
+        dict {str : float}: the relative change of each regressed benchmark.
+    """
+    regressions = {}
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        change = result['ops_per_sec'] / baseline[name]['ops_per_sec'] - 1
+        if change < -threshold:
+            regressions[name] = change
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Blackjack hot path benchmarks.')
+    parser.add_argument('names', nargs='*', help=f'benchmarks to run, from {list(BENCHMARKS)}')
+    parser.add_argument('--save', help='write the results as a JSON baseline')
+    parser.add_argument('--compare', help='JSON baseline to check for regressions')
+    parser.add_argument('--threshold', type=float, default=0.1)
+    parser.add_argument('--repeat', type=int, default=7)
+    args = parser.parse_args()
+
+    results = {}
+    for name in args.names or BENCHMARKS:
+        try:
+            result = runBenchmark(BENCHMARKS[name], args.repeat)
+        except ImportError as e:
+            print(f'{name:16} skipped ({e})')
+            continue
+        results[name] = result
+        print(f"{name:16} {result['ops_per_sec']:14,.0f} ops/sec "
+              f"± {result['stdev'] / result['ops_per_sec']:.1%}")
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compareResults(results, baseline, args.threshold)
+        for name, change in regressions.items():
+            print(f'REGRESSION {name}: {change:+.1%}')
+        if regressions:
+            raise SystemExit(1)
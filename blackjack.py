@@ -1,7 +1,10 @@
 import pygame
+import heapq
 import math
 from collections import namedtuple
+from itertools import count
 from cli_blackjack import Blackjack
+from render_cache import CardTextureCache, TextCache
 
 pygame.init()
 
@@ -15,17 +18,20 @@ class GUIBlackjack(Blackjack):
     # Buttons
     RADIUS = 50
     BTN_GAP = 40
+    # Label of the button for each action
+    ACTION_BUTTONS = {'hit': 'Hit', 'stand': 'Stand', 'split': 'Split', 'double': 'Double',
+                      'surrender': 'Surrender', 'insurance': 'Insure'}
 
     # Colours
     WHITE = (255, 255, 255)
     BLACK = (0, 0, 0)
     GREEN = (0, 255, 0)  # Win message
     GREEN_BG = (53, 101, 77)  # Poker green backgroud
-    BROWN = (180, 180, 180)  # 1 chip
-    RED = (255, 0, 0)  # 5 chip and lose message
-    BLUE = (0, 0, 255)  # 10 chip
-    YELLOW = (150, 150, 0)  # 50 chip and draw message
-    CHIP_BLACK = (220, 220, 220)  # 100 chip
+    BROWN = (180, 180, 180)  # 1 unit chip
+    RED = (255, 0, 0)  # 5 unit chip and lose message
+    BLUE = (0, 0, 255)  # 10 unit chip
+    YELLOW = (150, 150, 0)  # 50 unit chip and draw message
+    CHIP_BLACK = (220, 220, 220)  # 100 unit chip
     GREY = (84, 84, 84)  # Inactive button
 
     # Fonts
@@ -37,34 +43,72 @@ class GUIBlackjack(Blackjack):
     
     GameStatus = namedtuple('GameStatus', 'round_over draw player_won winnings')
 
-    def __init__(self, player_bank=1000):
-        super().__init__(player_bank=1000)
+    def __init__(self, player_bank=1000, rules=None):
+        super().__init__(player_bank=1000, rules=rules)
 
         self.win = pygame.display.set_mode((self.WIDTH, self.HEIGHT))  # Set resolution with tuple
         pygame.display.set_caption("Blackjack")  # Title along the window bar
         
         # Restricted to one player game when using GUI
-        self.player = self.people['player0']
+        self.player = self.players[0]
         
         self.default_game_status = self.GameStatus(round_over=False, draw=None, player_won=None, winnings=0)
         self.game_status = None
 
         self.card_scale_factor = 0.2
+        # Card images are decoded and scaled once, not on every frame
+        self.textures = CardTextureCache()
+        self.textures.preload(self.card_scale_factor)
+        # Rendered text is reused until the label changes
+        self.text_cache = TextCache()
         # Get typical card image size (for displaying cards centrally)
         self.card_size = self.getCardSize('2D')
         self.quit = False
         self.stand = False
+        
+        # Round progress, and the timed game steps waiting to run
+        self.state = None
+        self.timers = []  # Heap of (due time, id, callback)
+        self.timer_ids = count()
 
         # Buttons
         self.buttons = {}  # Dict {name : (x,y)}
         self.action_btns_active = True
         self.bet_btns_active = True
         self.action_btns = ['Hit', 'Stand']
-        self.bet_btns = ['1', '5', '10', '50', '100']
+        # Chips of 1, 5, 10, 50 and 100 bet units, so every bet is payable
+        self.bet_btns = [str(self.rules.bet_unit * chip) for chip in (1, 5, 10, 50, 100)]
         
         # Gap between displayed card hands when player has chosen split
         self.split_gap = self.card_size[0]
         self.box_highlighter_border = 3
+        
+        # Retained scene of window regions in drawing order, each with the 
+        # area it draws within, its draw function and a function returning 
+        # the state it displays. Only regions whose state has changed since 
+        # the last frame are redrawn and pushed to the screen.
+        # The action buttons region fits a button for every action in a row.
+        action_width = len(self.ACTION_BUTTONS) * (self.RADIUS*2 + self.BTN_GAP) - self.BTN_GAP + 4
+        self.regions = [
+            ('title', pygame.Rect(0, 0, self.WIDTH, 90), self.displayTitle, 
+             lambda: None),
+            ('dealer', pygame.Rect(0, 90, self.WIDTH - 200, 330), self.displayDealer, 
+             self.dealerState),
+            ('outcome', pygame.Rect(0, 420, self.WIDTH - 200, 160), self.displayRoundOutcome, 
+             lambda: self.game_status),
+            ('action_buttons', pygame.Rect(self.WIDTH/2 - action_width/2, self.HEIGHT/2 - 60, 
+                                           action_width, 120), 
+             self.displayActionButtons, 
+             lambda: (tuple(self.action_btns), self.action_btns_active)),
+            ('bet_buttons', pygame.Rect(self.WIDTH - 200, 0, 200, self.HEIGHT), 
+             self.displayBetButtons, lambda: self.bet_btns_active),
+            ('player', pygame.Rect(0, 580, self.WIDTH - 200, self.HEIGHT - 580), 
+             self.displayPlayer, self.playerState),
+            ('bank', pygame.Rect(0, self.HEIGHT - 120, 320, 120), self.displayBank, 
+             lambda: (self.player.bank, self.game_status)),
+        ]
+        self.region_states = {}  # {region name : state when last drawn}
+        self.redraw_all = True  # Redraw the entire window on the next frame
 
 
     # ------------ GAME TOOLS ---------------
@@ -73,45 +117,16 @@ class GUIBlackjack(Blackjack):
         """Returns the pixel size of the card image scaled by the class scale factor.
 
         Args:
-            card ("Card" namedtuple): the card to determine which image to use.
+            card (str): code of the card image to use, e.g. '2D'.
 
         Returns:
             tuple (int, int): size of the scaled card image. 
         """
-        image = pygame.image.load(f'resources/{card}.png')
+        image = self.textures.image(card)
         # Return the actual card image dimensions multipled by the scale factor 
         # used during game to display
         return tuple(map(lambda x: x*self.card_scale_factor, image.get_size()))
 
-    def scaleImg(self, image, scale_factor):
-        """Scales an image uniformly by a scale factor.
-
-        Args:
-            image (pygame surface): the image to scale.
-            scale_factor (float): the scale factor to scale the image by.
-
-        Returns:
-            pygame surface: scaled image.
-        """
-        width, height = image.get_size()
-        return pygame.transform.scale(image, (int(width*scale_factor), 
-                                              int(height*scale_factor)))
-    
-    def pauseGame(self, time):
-        """Pauses game actions for a input time while still handling pygame events 
-           (mouse click, window move etc.).
-
-        Args:
-            time (float): length of time to pause.
-        """
-        last = pygame.time.get_ticks()
-        while True and not self.quit:
-            now = pygame.time.get_ticks()
-            if now - last >= time:
-                break
-            self.handleEvents()
-            self.display()
-
     def enableAllButtons(self):
         """Make all available to interact with."""
         self.action_btns_active = True
@@ -121,6 +136,14 @@ class GUIBlackjack(Blackjack):
         """Grey out buttons and make them unavailable to interact with."""
         self.action_btns_active = False
         self.bet_btns_active = False
+    
+    def refreshActionButtons(self):
+        """Shows a button for each action the rules, cards and bank allow on
+           the hand being played, see legalActions. Refreshed after every bet
+           and action, as both change which actions the player can afford."""
+        legal = self.legalActions()
+        self.action_btns = [label for action, label in self.ACTION_BUTTONS.items() 
+                            if action in legal]
 
 
     # ----------DISPLAY FUNCTIONS--------------
@@ -137,7 +160,8 @@ class GUIBlackjack(Blackjack):
     
     def displayActionButtons(self):
         """Draws each action button on the window. Action buttons are used to 
-           take take an action on your hand (hit, split, stand)."""
+           take take an action on your hand (hit, stand, split, double, 
+           surrender, insure)."""
         for i, btn in enumerate(self.action_btns):
             # Draw a circle
             # Iterate through positions left to right along the middle of the screen
@@ -158,7 +182,7 @@ class GUIBlackjack(Blackjack):
             pygame.draw.circle(self.win, btn_colour, centre_pos, self.RADIUS, 3)
             
             # Draw text in centre of button
-            text = self.NORMAL.render(self.action_btns[i], 1, btn_colour)
+            text = self.text_cache.render(self.NORMAL, self.action_btns[i], btn_colour)
             self.win.blit(text, (int(centre_pos[0] - text.get_width()/2), 
                                  int(centre_pos[1] - text.get_height()/2)))
             
@@ -188,7 +212,7 @@ class GUIBlackjack(Blackjack):
             pygame.draw.circle(self.win, btn_colour, centre_pos, self.RADIUS, 3)
             
             # Draw text in centre of button
-            text = self.NORMAL.render(btn, 1, text_colour)
+            text = self.text_cache.render(self.NORMAL, btn, text_colour)
             self.win.blit(text, (int(centre_pos[0] - text.get_width()/2), 
                                  int(centre_pos[1] - text.get_height()/2)))
             
@@ -202,8 +226,8 @@ class GUIBlackjack(Blackjack):
 
     def buildHandValueString(self, dealer=False, player_id=0):
         """Build a string representing a person's hand value to display in game.
-           Hand values are internally stored as a tuple containing all possible
-           values a hand could take (as Aces can take two values).
+           A soft hand shows both values it could take (as Aces can take two 
+           values), e.g. '7 or 17'.
 
         Args:
             dealer (bool, optional): whether to use the dealers hand value instead 
@@ -219,10 +243,10 @@ class GUIBlackjack(Blackjack):
         """
         no_hands = 1  # Assume single pile of cards (no split)
         if dealer:
-            hand_value = self.people['dealer'].hand.hand_value
+            hand_value = self.dealer.hand.hand_value
         else:
-            hand_value = self.people[f'player{player_id}'].hand.hand_value
-            if self.people[f'player{player_id}'].hand.split:
+            hand_value = self.players[player_id].hand.hand_value
+            if self.players[player_id].hand.split:
                 no_hands = 2
         
         # If no split, add single hand value to list for generalised loop below
@@ -232,17 +256,10 @@ class GUIBlackjack(Blackjack):
         # Build hand value strings
         strings = []
         for i in range(no_hands):
-            string = ''
-            for idx, value in enumerate(hand_value[i]):
-                string += str(value)
-                if idx >= len(hand_value[i]) - 1:
-                    string += ' '
-                else:
-                    string += ' or '
-            strings.append(string)
+            strings.append(f'{hand_value[i]} ')
         
         # If split, return hand value for both hands
-        if not dealer and self.people[f'player{player_id}'].hand.split:
+        if not dealer and self.players[player_id].hand.split:
             return strings[0], strings[1] 
         # Return hand value for a single card
         return strings[0]
@@ -266,7 +283,7 @@ class GUIBlackjack(Blackjack):
         """Draws a pile of overlapping cards on the window.
 
         Args:
-            cards (list of "Card" namedtuples): List of cards to display.
+            cards (list of int): List of encoded cards to display.
             centre_pos (tuple (x,y)): Centre position of the entire card pile 
                                       (coordinates on the window).
         """
@@ -275,9 +292,7 @@ class GUIBlackjack(Blackjack):
 
         shift = 0  # Shift each subsequent card along to get spread effect
         for card in cards:
-            card_code = card.rank + card.suit[0].upper()
-            image = pygame.image.load(f'resources/{card_code}.png')
-            image = self.scaleImg(image, self.card_scale_factor)
+            image = self.textures.get(card, self.card_scale_factor)
             self.win.blit(image, (int(pos[0] + shift), int(pos[1])))
             shift += (self.card_size[0])/2
     
@@ -292,9 +307,9 @@ class GUIBlackjack(Blackjack):
             player_id (int, optional): [description]. Defaults to 0.
         """
         if dealer:
-            cards = self.people['dealer'].hand.cards
+            cards = self.dealer.hand.cards
         else:
-            cards = self.people[f'player{player_id}'].hand.cards
+            cards = self.players[player_id].hand.cards
 
         if len(cards) > 0:
             # If split, cards = [[cards1], [cards2]] rather than [cards]
@@ -326,6 +341,27 @@ class GUIBlackjack(Blackjack):
             else:  # Normal, single-pile hand
                 self.displayCardPile(cards, centre_pos)
     
+    def displayTitle(self):
+        """Displays the title at the top of the window."""
+        text = self.text_cache.render(self.TITLE, 'Blackjack', self.BLACK)
+        self.win.blit(text, (int(self.WIDTH/2 - text.get_width()/2), 20))
+    
+    def dealerState(self):
+        """The dealer's hand as displayed, to detect when it needs redrawing."""
+        return (tuple(self.dealer.hand.cards), self.dealer.hand.bust, 
+                str(self.dealer.hand.hand_value))
+    
+    def playerState(self, player_id=0):
+        """A player's hand as displayed, to detect when it needs redrawing."""
+        hand = self.players[player_id].hand
+        if hand.split:
+            cards = (tuple(hand.cards[0]), tuple(hand.cards[1]))
+            hand_value = (str(hand.hand_value[0]), str(hand.hand_value[1]))
+        else:
+            cards = tuple(hand.cards)
+            hand_value = str(hand.hand_value)
+        return (cards, hand.bust, hand_value, hand.bet, self.current_side)
+    
     def displayDealer(self):
         """Displays dealers cards, current hand value and whether they've bust."""
         # Display cards
@@ -333,14 +369,14 @@ class GUIBlackjack(Blackjack):
         self.displayCards(centre_pos, dealer=True)
         
         # Display bust
-        if self.people['dealer'].hand.bust:
-            text = self.HUGE.render('BUST', 1, self.RED)
+        if self.dealer.hand.bust:
+            text = self.text_cache.render(self.HUGE, 'BUST', self.RED)
             self.win.blit(text, (int(centre_pos[0] - text.get_width()/2),
                                  int(centre_pos[1] - text.get_height()/2)))
             
         # Display hand value
         hand_value_str = self.buildHandValueString(dealer=True)
-        text = self.NORMAL.render(hand_value_str, 1, self.BLACK)
+        text = self.text_cache.render(self.NORMAL, hand_value_str, self.BLACK)
         self.win.blit(text, (int(centre_pos[0] - text.get_width()/2), int(centre_pos[1] + (self.card_size[1])/2 + 20)))
     
     def displayPlayer(self, player_id=0):
@@ -350,7 +386,7 @@ class GUIBlackjack(Blackjack):
             player_id (int, optional): The ID of the player to be displayed. 
                                        Defaults to 0.
         """
-        player = self.people[f'player{player_id}']
+        player = self.players[player_id]
         
         # Display cards
         centre_pos = (self.WIDTH/2, 800)
@@ -364,144 +400,120 @@ class GUIBlackjack(Blackjack):
             # Check left hand then right hand
             for i in range(2):
                 if player.hand.bust[i]:
-                    text = self.HUGE.render('BUST', 1, self.RED)
+                    text = self.text_cache.render(self.HUGE, 'BUST', self.RED)
                     self.win.blit(text, (int(centre_pos[0] - text.get_width()/2 + x_pos_change[i]), 
                                         int(centre_pos[1] - text.get_height()/2)))
         else:
             if player.hand.bust:
-                text = self.HUGE.render('BUST', 1, self.RED)
+                text = self.text_cache.render(self.HUGE, 'BUST', self.RED)
                 self.win.blit(text, (int(centre_pos[0] - text.get_width()/2), 
                                     int(centre_pos[1] - text.get_height()/2)))
             
-        # Display players bank value
-        bank_value = player.bank
-        text = self.LARGER.render(f'£{bank_value}', 1, self.BLACK)
-        self.win.blit(text, (int(100 - text.get_width()/2), 
-                             int(self.HEIGHT - 100)))
-        
-        # Display any winnings from the last round next to player's bank value 
-        if self.game_status.round_over:
-            if self.game_status.winnings > 0:
-                winnings_text = self.NORMAL.render(f'+{self.game_status.winnings}', 1, self.BLACK)
-                self.win.blit(winnings_text, (int(100 - text.get_width()/2 + 130), 
-                                              int(self.HEIGHT + winnings_text.get_height()/2 - 100)))
-                
         # Display hand value below player's cards
         if player.hand.split:
             left_hand_value_str, right_hand_value_str = self.buildHandValueString()
-            left_text = self.NORMAL.render(left_hand_value_str, 1, self.BLACK)
-            right_text = self.NORMAL.render(right_hand_value_str, 1, self.BLACK)
+            left_text = self.text_cache.render(self.NORMAL, left_hand_value_str, self.BLACK)
+            right_text = self.text_cache.render(self.NORMAL, right_hand_value_str, self.BLACK)
             self.win.blit(left_text, (int(centre_pos[0] - left_text.get_width()/2 - self.split_gap), 
                                       int(centre_pos[1] + (self.card_size[1])/2 + 20)))
             self.win.blit(right_text, (int(centre_pos[0] - right_text.get_width()/2 + self.split_gap), 
                                        int(centre_pos[1] + (self.card_size[1])/2 + 20)))
         else:
             hand_value_str = self.buildHandValueString()
-            text = self.NORMAL.render(hand_value_str, 1, self.BLACK)
+            text = self.text_cache.render(self.NORMAL, hand_value_str, self.BLACK)
             self.win.blit(text, (int(centre_pos[0] - text.get_width()/2), 
                                  int(centre_pos[1] + (self.card_size[1])/2 + 20)))
         
+        
         # Display bet value
         bet_value = player.hand.bet
         if bet_value != 0:
-            text = self.NORMAL.render(f'£{bet_value}', 1, self.BLACK)
+            text = self.text_cache.render(self.NORMAL, f'£{bet_value}', self.BLACK)
             self.win.blit(text, (int(centre_pos[0] - text.get_width()/2 + 200), 
                                  int(centre_pos[1])))
     
+    def displayBank(self, player_id=0):
+        """Display players bank value and any winnings from the last round.
+
+        Args:
+            player_id (int, optional): The ID of the player to be displayed. 
+                                       Defaults to 0.
+        """
+        player = self.players[player_id]
+        
+        # Display players bank value
+        bank_value = player.bank
+        text = self.text_cache.render(self.LARGER, f'£{bank_value}', self.BLACK)
+        self.win.blit(text, (int(100 - text.get_width()/2), 
+                             int(self.HEIGHT - 100)))
+        
+        # Display any winnings from the last round next to player's bank value 
+        if self.game_status.round_over:
+            if self.game_status.winnings > 0:
+                winnings_text = self.text_cache.render(self.NORMAL, f'+{self.game_status.winnings}', self.BLACK)
+                self.win.blit(winnings_text, (int(100 - text.get_width()/2 + 130), 
+                                              int(self.HEIGHT + winnings_text.get_height()/2 - 100)))
+    
     def displayRoundOutcome(self):
         """Using the game status modified by the recordWinners function, display whether """
         if self.game_status.round_over:
             centre_pos = (int(self.WIDTH/2), int(self.HEIGHT/2))
             if self.game_status.draw:
-                text = self.GIGANTIC.render('DRAW', 1, self.YELLOW)
+                text = self.text_cache.render(self.GIGANTIC, 'DRAW', self.YELLOW)
             elif self.game_status.player_won:
-                text = self.GIGANTIC.render('YOU WIN', 1, self.GREEN)
+                text = self.text_cache.render(self.GIGANTIC, 'YOU WIN', self.GREEN)
             else:
-                text = self.GIGANTIC.render('YOU LOSE', 1, self.RED)
+                text = self.text_cache.render(self.GIGANTIC, 'YOU LOSE', self.RED)
             self.win.blit(text, (int(centre_pos[0] - text.get_width()/2), 
                                  int(centre_pos[1] - text.get_height()/2)))
     
     def display(self):
-        """Displays the current blackjack game state to the window."""
-        self.win.fill(self.GREEN_BG)
-
-        # Title at top of screen
-        text = self.TITLE.render('Blackjack', 1, self.BLACK)
-        self.win.blit(text, (int(self.WIDTH/2 - text.get_width()/2), 20))
-
-        self.displayButtons()
-        self.displayDealer()
-        self.displayPlayer()
-        # Display "you win", "draw" or "you lose"
-        self.displayRoundOutcome()
-
-        pygame.display.update()  # Update the display
+        """Displays the current blackjack game state to the window, redrawing
+           only the regions that have changed since the last frame. Frames 
+           with no changes are skipped entirely."""
+        full = self.redraw_all
+        self.redraw_all = False
+        if full:
+            self.win.fill(self.GREEN_BG)
+        
+        # Find regions displaying a different state to when they were last drawn
+        dirty = []
+        for name, rect, draw, state in self.regions:
+            current = state()
+            if full or self.region_states.get(name) != current:
+                self.region_states[name] = current
+                dirty.append(rect)
+        if not dirty:
+            return
+        
+        # Clear each changed area and redraw every region overlapping it, in 
+        # order, clipped to the cleared area
+        for area in dirty:
+            self.win.set_clip(area)
+            self.win.fill(self.GREEN_BG)
+            for name, rect, draw, state in self.regions:
+                if rect.colliderect(area):
+                    self.win.set_clip(area.clip(rect))
+                    draw()
+        self.win.set_clip(None)
+
+        if full:
+            pygame.display.update()  # Update the display
+        else:
+            pygame.display.update(dirty)  # Update only the changed areas
 
 
     # ------------ GAME FUNCITONS -----------------
 
-    def getHandResults(self, player_id=0):
-        player = self.people[f'player{player_id}']
-        
-        if player.hand.split:
-            hand_results = []
-            # Get result for both hand
-            for i in range(2):
-                # Check hand for win
-                if (player.hand.hand_value[i] > self.people['dealer'].hand.hand_value or \
-                            self.people['dealer'].hand.bust) and not player.hand.bust[i]:
-                    # Record win
-                    hand_results.append('win')
-                elif player.hand.hand_value[i] == self.people['dealer'].hand.hand_value or \
-                            self.player.hand.bust and self.people['dealer'].hand.bust:
-                    # Record draw
-                    hand_results.append('draw')
-                else:
-                    # Player lose
-                    hand_results.append('lose')
-        return tuple(hand_results)
-    
     def recordWinners(self):
-        """Checks player result and alters the game status to indicate their
+        """Settles the player's hand and alters the game status to indicate their
            win, loss or draw during the next execution of the display function."""
-        winnings = 0
-        win_game_status = self.GameStatus(round_over=True, draw=False, player_won=True, winnings=winnings)
-        draw_game_status = self.GameStatus(round_over=True, draw=True, player_won=None, winnings=winnings)
-        lose_game_status = self.GameStatus(round_over=True, draw=False, player_won=False, winnings=winnings)
-        
-        # TODO : REVIEW
-        if self.player.hand.split:
-            winnings = self.calcSplitWinnings()
-            # Get tuple of results for the two hands e.g. ('win', 'draw')
-            hand_results = self.getHandResults()
-                
-            # Calculate overall results and set game status for end screen
-            # Based on combination of results for both hands
-            if hand_results[0] == 'win' or hand_results[1] == 'win':  # One hand wins
-                self.game_status = win_game_status
-                self.collectWinnings(player_id=0, override_winnings=winnings)  
-            elif hand_results[0] == 'draw' or hand_results[1] == 'draw':  # If two draws, or one draw and a loss 
-                self.game_status = draw_game_status
-                self.collectWinnings(player_id=0, draw=True, override_winnings=winnings)
-            else:  # Both lose
-                self.game_status = lose_game_status
-
-        else:
-            if (self.player.hand.hand_value > self.people['dealer'].hand.hand_value or \
-                        self.people['dealer'].hand.bust) and not self.player.hand.bust:
-                # Player win
-                winnings = self.player.hand.bet*2
-                self.game_status = win_game_status
-                self.collectWinnings(player_id=0)
-            elif self.player.hand.hand_value == self.people['dealer'].hand.hand_value or \
-                        self.player.hand.bust and self.people['dealer'].hand.bust:
-                # Draw
-                winnings += self.player.hand.bet
-                self.game_status = draw_game_status
-                self.collectWinnings(player_id=0, draw=True)
-            else:
-                # Player lose
-                self.game_status = lose_game_status
+        bank = self.player.bank
+        outcome = self.checkWinners()[0]
+        self.game_status = self.GameStatus(round_over=True, draw=outcome == 'draw', 
+                                           player_won={'win': True, 'draw': None, 
+                                                       'lose': False}[outcome], 
+                                           winnings=self.player.bank - bank)
 
     def handleEvents(self):
         """Handle events that have occurred since the last time this function
@@ -510,6 +522,8 @@ class GUIBlackjack(Blackjack):
         for event in pygame.event.get():
             if event.type == pygame.QUIT:  # Window close button pressed
                 self.quit = True
+            elif event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+                self.redraw_all = True  # Window contents need restoring
             elif event.type == pygame.MOUSEBUTTONDOWN:
                 m_x, m_y = pygame.mouse.get_pos()  # x,y pos of mouse
                 
@@ -517,107 +531,158 @@ class GUIBlackjack(Blackjack):
                 for btn, pos in self.buttons.items():
                     d = math.sqrt((pos[0] - m_x)**2 + (pos[1] - m_y)**2)
                     if d < self.RADIUS:  # If click inside this button
-                        # No longer possible to split after first action taken
                         if btn in self.action_btns and self.action_btns_active:
-                            if 'Split' in self.action_btns:
-                                self.action_btns.remove('Split')
-                        if btn == 'Hit' and self.action_btns_active:
-                            self.personDraws(side=self.current_side)
+                            self.takeAction(btn)
                             # Player no longer able to bet
                             self.bet_btns_active = False
                             break  # No other button needs to be checked
-                        elif btn == 'Stand' and self.action_btns_active:
-                            # If already split and now played stand on left hand
-                            if self.player.hand.split and self.current_side == 'left':
-                                # Future actions now affect right hand
-                                self.current_side = 'right'
-                            else:
-                                self.stand = True
-                                # Turn off all buttons while dealer plays
-                                self.action_btns_active = False
-                            self.bet_btns_active = False
-                            break
-                        elif btn == 'Split' and self.action_btns_active:
-                            self.split()
-                            break
                         elif btn.isdigit() and self.bet_btns_active:
-                            self.player.placeBet(int(btn))
+                            # Only bets every payout can be paid on in whole chips
+                            if self.rules.payable(int(btn)) and self.placeBet(int(btn)):
+                                self.refreshActionButtons()
                             break
+    
+    def takeAction(self, btn):
+        """Plays the action of an action button on the player's hand.
+
+        Args:
+            btn (str): the button's label, see ACTION_BUTTONS.
+        """
+        side = self.current_side
+        if btn == 'Hit':
+            self.personDraws(side=side)
+        elif btn == 'Split':
+            self.split()
+        elif btn == 'Insure':
+            self.insure()
+        elif btn == 'Surrender':
+            self.surrender()
+            self.stand = True
+        elif btn == 'Double' and not self.double():
+            pass  # Not enough in the bank to double, the hand plays on
+        else:  # Stand or double, which ends the hand after one card
+            if btn == 'Stand':
+                self.playerStands()
+            # If already split and now finished the left hand
+            if self.player.hand.split and side == 'left':
+                # Future actions now affect right hand
+                self.current_side = 'right'
+            else:
+                self.stand = True
+        
+        if self.stand:
+            # Turn off all buttons while dealer plays
+            self.action_btns_active = False
+        self.refreshActionButtons()
+
+    # ------------ ROUND STATE MACHINE -----------------
+    
+    def schedule(self, delay, callback):
+        """Schedules a game step to run after a delay, without blocking the
+           event loop in the meantime.
+
+        Args:
+            delay (int): time to wait in milliseconds.
+            callback (function): the game step to run.
+        """
+        heapq.heappush(self.timers, (pygame.time.get_ticks() + delay, 
+                                     next(self.timer_ids), callback))
+    
+    def runTimers(self):
+        """Runs every scheduled game step that has become due."""
+        now = pygame.time.get_ticks()
+        while self.timers and self.timers[0][0] <= now:
+            _, _, callback = heapq.heappop(self.timers)
+            callback()
+    
+    def startRound(self):
+        """Begins a round by dealing the dealer's card."""
+        self.state = 'dealing'
+        self.game_status = self.default_game_status
+        # Disable all buttons while set up game
+        self.disableAllButtons()
+        
+        # Dealer initialise
+        self.personDraws(dealer=True)
+        self.schedule(1000, self.dealPlayerFirstCard)
+    
+    def dealPlayerFirstCard(self):
+        self.personDraws()
+        self.schedule(1000, self.dealPlayerSecondCard)
+    
+    def dealPlayerSecondCard(self):
+        """Deals the player's second card and hands control to the player."""
+        self.personDraws()
+        # Add a button for each other action available, such as split
+        self.refreshActionButtons()
+        
+        # Ensure all buttons active before play
+        self.enableAllButtons()
+        self.stand = False
+        self.state = 'player_turn'
+    
+    def checkPlayerTurn(self):
+        """Ends the player's turn once they have stood or bust."""
+        if self.calcBust():  # Update players hand bust status
+            self.action_btns_active = False  # Grey out action buttons if bust
+            self.state = 'waiting'
+            self.schedule(1000, self.endPlayerTurn)
+        elif self.stand:
+            self.endPlayerTurn()
+    
+    def endPlayerTurn(self):
+        """Starts the dealer drawing, unless every player has bust or 
+           surrendered."""
+        if not self.dealerPlays():
+            self.finishRound()
+        else:
+            if self.verbose:
+                print('Dealer begins drawing...\n{}\n'.format(self.dealer))
+            self.state = 'dealer_turn'
+            self.schedule(1500, self.dealerDraws)
+    
+    def dealerDraws(self):
+        """Dealer draws a card, and continues after a pause until they stand."""
+        self.personDraws(dealer=True)
+        if self.dealerContinueDraw():
+            self.schedule(1500, self.dealerDraws)
+        else:
+            # Update dealer bust status
+            self.calcBust(dealer=True)
+            self.schedule(2000, self.finishRound)  # Pause to view the result
+    
+    def finishRound(self):
+        """Settles the round and shows the result before starting the next."""
+        # Set a new game status for a finished round
+        self.recordWinners()
+        self.state = 'round_over'
+        self.schedule(2000, self.nextRound)  # Pause to view the result
+    
+    def nextRound(self):
+        self.reset()  # Redraw new hands
+        self.action_btns = ['Hit', 'Stand']
+        self.startRound()
 
     def main(self):
         """One player GUI Blackjack game.
-           Overrides the parent class playGame (command line version) method."""
+           Overrides the parent class playGame (command line version) method.
+           
+           A single loop paced by the clock handles events, runs any game 
+           steps that have become due and redraws whatever has changed, so 
+           the game idles between frames rather than spinning during pauses."""
         
         FPS = 60  # Max frames per second
         # Create a clock obeject to make sure our game runs at this FPS
         clock = pygame.time.Clock()
-        game_count = 0
         
+        self.startRound()
         while not self.quit:
             clock.tick(FPS)
-            self.game_status = self.default_game_status
-            
-            # Disable all buttons while set up game
-            self.disableAllButtons()
-            self.display()
-            
-            # Dealer initialise
-            self.personDraws(dealer=True)
-            self.display()
-            self.pauseGame(1000)
-            
-            # Players initialise
-            self.personDraws()
-            self.pauseGame(1000)
-            self.personDraws()
-            # Check if split is an option
-            if self.canSplit():
-                self.action_btns.append('Split')  # Add split button
+            self.handleEvents()
+            if self.state == 'player_turn':
+                self.checkPlayerTurn()
+            self.runTimers()
             self.display()
-            
-            # Ensure all buttons active before play
-            self.enableAllButtons()
-            
-            # PLAYER GAME LOOP
-            self.stand = False
-            while not self.stand and not self.quit:
-                self.handleEvents()  # Update stand (if stand action selected)
-                self.display()
-                if self.calcBust():  # Update players hand bust status
-                    self.action_btns_active = False  # Grey out action buttons if bust
-                    self.pauseGame(1000)
-                    break
-            
-            # DEALER GAME LOOP
-            if not self.allBust() and not self.quit:
-                print('Dealer begins drawing...\n{}\n'.format(self.people['dealer']))
-
-                # Dealer draws
-                wait_before_draw = 1500
-                last = pygame.time.get_ticks()
-                while self.dealerContinueDraw():
-                    now = pygame.time.get_ticks()
-                    if now - last >= wait_before_draw:
-                        self.personDraws(dealer=True)
-                        self.display()
-                        last = now
-                    self.handleEvents()
-                
-                # Update dealer bust status
-                self.calcBust(dealer=True)
-                self.pauseGame(2000)  # Pause to view the result
-            
-            if not self.quit:
-                # Set a new game status for a finished round
-                self.recordWinners()
-                self.display()
-                self.pauseGame(2000)  # Pause to view the result
-                
-                self.reset()  # Redraw new hands
-                self.action_btns_active = True
-                self.bet_btns_active = True
-                game_count += 1
-
 
 
 if __name__ == "__main__":
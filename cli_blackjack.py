@@ -1,22 +1,89 @@
-from people import Player, Dealer
-from hand import Deck
+from table import Table
+from hand_history import Event
+from settlement import settleHand, settleInsurance, OUTCOME_NAMES
+from rules import RuleSet
+from hand import Shoe, HandValue, VALUES
 import time
 
 
 class Blackjack:
-    def __init__(self, no_players=1, player_bank=1000):
-        self.deck = Deck()
+    def __init__(self, no_players=1, player_bank=1000, no_decks=6, penetration=0.75,
+                 verbose=True, rng=None, rules=None):
+        self.deck = Shoe(no_decks, penetration, rng)
         self.no_players = no_players
+        self.verbose = verbose  # Print game progress to the console
+        # Table rules, see rules.py. Defaults to S17, double on any two cards
+        # and double after split.
+        self.rules = rules if rules is not None else RuleSet()
         
-        # People dict holds {name : person_object}
-        self.people = {}
-        # Add the dealer
-        self.people['dealer'] = Dealer()
-        # Add each player
-        for i in range(self.no_players):
-            self.people[f'player{i}'] = Player(player_bank)
+        # Table of indexed player seats, with the dealer held separately
+        self.table = Table(self.no_players, player_bank)
+        self.dealer = self.table.dealer
+        self.players = self.table.seats
             
         self.current_side = None  # If split, hit on left pile then right
+        self.round_count = 0  # Rounds completed
+        
+        # Hand history sinks, see hand_history.py. Events are only built
+        # while at least one sink is attached.
+        self.event_sinks = []
+    
+    def emit(self, kind, seat=-1, side=None, card=-1, value=0, amount=0, outcome=None):
+        """Sends a hand history event to every attached sink. Callers check
+           event_sinks first so nothing is built when no sink is attached."""
+        event = Event(kind, self.round_count, seat, side, card, value, amount, outcome)
+        for sink in self.event_sinks:
+            sink.write(event)
+    
+    def _emitDraw(self, dealer, player_id, side, card):
+        """Emits a card drawn by personDraws as a deal, hit or dealer draw."""
+        if dealer:
+            hand_value = self.dealer.hand.hand_value
+            kind = 'deal' if hand_value.no_cards == 1 else 'dealer_draw'
+            self.emit(kind, card=card, value=hand_value.best)
+            return
+        hand = self.players[player_id].hand
+        amount = 0
+        if hand.split:
+            pile = 0 if side == 'left' else 1
+            hand_value = hand.hand_value[pile]
+            kind = 'double' if hand.doubled[pile] else 'hit'
+            if hand.doubled[pile]:
+                amount = hand.pileBets()[pile] // 2
+        else:
+            hand_value = hand.hand_value
+            if hand_value.no_cards <= 2:
+                kind = 'deal'
+            elif hand.doubled:
+                kind = 'double'
+                amount = hand.bet // 2
+            else:
+                kind = 'hit'
+        self.emit(kind, player_id, side, card, hand_value.best, amount)
+    
+    def placeBet(self, bet, player_id=0):
+        """Places a bet on a player's hand.
+
+        Returns:
+            boolean: whether the player had sufficient funds to place the bet.
+        """
+        placed = self.players[player_id].placeBet(bet)
+        if placed and self.event_sinks:
+            self.emit('bet', player_id, amount=bet)
+        return placed
+    
+    def pileValue(self, player_id=0):
+        """Value of a player's hand, or of the pile being played if split."""
+        hand = self.players[player_id].hand
+        if hand.split:
+            return hand.hand_value[0 if self.current_side == 'left' else 1]
+        return hand.hand_value
+    
+    def playerStands(self, player_id=0):
+        """Records a player standing on their current hand."""
+        if self.event_sinks:
+            self.emit('stand', player_id, self.current_side,
+                      value=self.pileValue(player_id).best)
     
     def canSplit(self, player_id=0):
         """Checks whether a player has the appropriate hand to be able to split.
@@ -28,12 +95,77 @@ class Blackjack:
         Returns:
             boolean: whether the player can split with the hand they have.
         """
-        player_cards = self.people[f'player{player_id}'].hand.cards
+        hand = self.players[player_id].hand
+        player_cards = hand.cards
         
-        if len(player_cards) == 2:
-            # Possible to split if both cards are the same value
-            return player_cards[0].value == player_cards[1].value
+        # A hand that has already been split holds two piles, not two cards,
+        # and splitting needs a second bet equal to the first
+        if not hand.split and len(player_cards) == 2 and \
+                self.players[player_id].bank >= hand.bet:
+            # Possible to split if both cards are the same value and the rules allow
+            value = VALUES[player_cards[0]]
+            return value == VALUES[player_cards[1]] and self.rules.can_split[value]
         return False
+    
+    def canDouble(self, player_id=0):
+        """Checks whether a player may double down on their hand, or on the pile
+           being played if split. Doubling needs a second bet equal to the
+           first, and is allowed on two card hands by the table rules."""
+        player = self.players[player_id]
+        hand = player.hand
+        if hand.split:
+            pile = 0 if self.current_side == 'left' else 1
+            hand_value = hand.hand_value[pile]
+            doubled = hand.doubled[pile]
+            bet = hand.pileBets()[pile]
+        else:
+            hand_value = hand.hand_value
+            doubled = hand.doubled
+            bet = hand.bet
+        return not doubled and hand_value.no_cards == 2 and player.bank >= bet and \
+            self.rules.can_double[hand.split][hand_value.soft][hand_value.best]
+    
+    def canSurrender(self, player_id=0):
+        """Checks whether a player may surrender, which the table rules allow
+           on a hand's first two cards only."""
+        hand = self.players[player_id].hand
+        return self.rules.surrender and not hand.split and not hand.surrendered and \
+            hand.hand_value.no_cards == 2
+    
+    def canInsure(self, player_id=0):
+        """Checks whether a player may take insurance, which the table rules
+           offer against the dealer's upcard before the hand is played."""
+        player = self.players[player_id]
+        hand = player.hand
+        upcard = self.dealer.hand.cards
+        return bool(upcard) and self.rules.offers_insurance[VALUES[upcard[0]]] and \
+            not hand.insurance and not hand.split and hand.hand_value.no_cards == 2 and \
+            0 < hand.bet // 2 <= player.bank
+    
+    def legalActions(self, player_id=0):
+        """The actions a player may take on their hand, or on the pile being
+           played if split.
+
+        Args:
+            player_id (int, optional): the ID of the player acting. Defaults to 0.
+
+        Returns:
+            list of str: 'stand', followed by whichever of 'hit', 'split',
+                         'double', 'surrender' and 'insurance' the rules, cards
+                         and player's bank allow.
+        """
+        actions = ['stand']
+        if self.pileValue(player_id).best < 21:
+            actions.append('hit')
+        if self.canSplit(player_id):
+            actions.append('split')
+        if self.canDouble(player_id):
+            actions.append('double')
+        if self.canSurrender(player_id):
+            actions.append('surrender')
+        if self.canInsure(player_id):
+            actions.append('insurance')
+        return actions
 
     def playerBust(self, bust):
         """Checks whether the player is bust by extracting a overall bust boolean 
@@ -53,189 +185,253 @@ class Blackjack:
         else:
             return bust
     
-    def split(self):
-        """Splits a players hand."""
-        self.player.hand.split = True
+    def split(self, player_id=0):
+        """Splits a players hand.
+
+        Returns:
+            boolean: whether the player had sufficient funds for the second
+                     pile's bet. The hand is left unsplit if not.
+        """
+        player = self.players[player_id]
+        # The second pile carries a bet equal to the first
+        if not player.placeBet(player.hand.bet):
+            return False
+        player.hand.split = True
         
         # Modify cards to indicate split
-        card1, card2 = self.player.hand.cards[0], self.player.hand.cards[1]
-        self.player.hand.cards = [[card1], [card2]]
+        card1, card2 = player.hand.cards[0], player.hand.cards[1]
+        player.hand.cards = [[card1], [card2]]
         
         # Modify hand value to indivate split
-        hand_value1, hand_value2 = card1.value, card2.value
-        # If the card is not an Ace, cast to a tuple hand value representation
-        # An Ace has two possible values and is represented as a tuple by default
-        if type(hand_value1) is int:
-            hand_value1 = (hand_value1, )
-        if type(hand_value2) is int:
-            hand_value2 = (hand_value2, )
         # Create tuple pair of hand values, one for left and right card pile
-        self.player.hand.hand_value = (hand_value1, hand_value2)
+        player.hand.hand_value = (HandValue([card1]), HandValue([card2]))
         
         # Modify bust to indicate split
-        self.player.hand.bust = tuple((False, False))
+        player.hand.bust = tuple((False, False))
+        player.hand.doubled = tuple((False, False))
         self.current_side = 'left'
+        if self.event_sinks:
+            self.emit('split', player_id)
+        return True
+    
+    def double(self, player_id=0):
+        """Doubles the bet on a player's hand, or on the pile being played if
+           split, and draws the one further card it receives.
+
+        Returns:
+            boolean: whether the player had sufficient funds to double. The
+                     hand is left as it was if not.
+        """
+        player = self.players[player_id]
+        hand = player.hand
+        if hand.split:
+            pile = 0 if self.current_side == 'left' else 1
+            if not player.placeBet(hand.pileBets()[pile]):
+                return False
+            doubled = list(hand.doubled)
+            doubled[pile] = True
+            hand.doubled = tuple(doubled)
+        else:
+            if not player.placeBet(hand.bet):
+                return False
+            hand.doubled = True
+        self.personDraws(player_id=player_id, side=self.current_side)
+        self.calcBust(player_id=player_id)
+        return True
+    
+    def surrender(self, player_id=0):
+        """Gives up a player's hand, for half the bet back at settlement."""
+        hand = self.players[player_id].hand
+        hand.surrendered = True
+        self.table.markSurrendered(player_id)
+        if self.event_sinks:
+            self.emit('surrender', player_id, value=hand.hand_value.best)
+    
+    def insure(self, player_id=0):
+        """Takes insurance for a player, a side bet of half their bet that the
+           dealer makes a natural."""
+        player = self.players[player_id]
+        insurance = player.hand.bet // 2
+        player.bank -= insurance
+        player.hand.insurance = insurance
+        if self.event_sinks:
+            self.emit('insurance', player_id, amount=insurance)
     
     def calcBust(self, dealer=False, player_id=0):
         """Checks whether a given players hand has bust (hand value exceeded 21)."""
         if dealer:
-            player = self.people['dealer']
+            player = self.dealer
         else:
-            player = self.people[f'player{player_id}']
+            player = self.players[player_id]
             
             if player.hand.split:
                 # For checking if left pile has JUST bust and need to move to right pile
                 original = player.hand.bust
-                left_bust = True
-                for hand_value in player.hand.hand_value[0]:
-                    if hand_value <= 21:
-                        left_bust = False
+                left_bust = player.hand.hand_value[0].bust
                 # If calc bust has already been run after split selected and bust has been converted to tuple 
                 if type(original) is tuple:
                     # Check if left pile has JUST gone bust
                     if original[0] == False and left_bust:
                         self.current_side = 'right'  # Move to right pile
-                right_bust = True
-                for hand_value in player.hand.hand_value[1]:
-                    if hand_value <= 21:
-                        right_bust = False
+                right_bust = player.hand.hand_value[1].bust
                 player.hand.bust = tuple((left_bust, right_bust))
+                if left_bust and right_bust:
+                    self.table.markBust(player_id)
                 # Player finished playing if right (second) pile has bust
                 return right_bust  
             
         # Default, one-card-pile bust check
-        bust = True
-        # Check if there is a possible hand value under 21
-        for hand_value in player.hand.hand_value:
-            if hand_value <= 21:
-                bust = False
+        bust = player.hand.hand_value.bust
         player.hand.bust = bust
+        if bust and not dealer:
+            self.table.markBust(player_id)
         return bust
 
     def dealerContinueDraw(self):
-        """Checks if any possible hand values is still under 17.
-           Determines whether the dealer should continue to draw"""
+        """Checks if the dealer's best hand value is still under 17, or a soft
+           17 if the dealer hits soft 17. Determines whether the dealer should
+           continue to draw"""
         if self.calcBust(dealer=True):
             return False
         
-        # Check if any possible hand values are under 17
-        for hand_value in self.people['dealer'].hand.hand_value:
-            if hand_value < 17:
-                return True
-        
-        return False
+        # Looked up in the rule set's compiled dealer table
+        hand_value = self.dealer.hand.hand_value
+        return self.rules.dealer_draws[hand_value.soft][hand_value.best]
     
     def personDraws(self, dealer=False, player_id=0, side=None, times=1):
         """Player draws input number of times."""
         if dealer:
-            print('Dealer draws', end='')
-            player = self.people['dealer']
-        else:
-            print(f'Player {player_id + 1} draws', end='')
-            player = self.people[f'player{player_id}']
-        
-        # If drawing multiple times display multiple
-        if times > 1:
-            print(f' X{times}')
+            player = self.dealer
         else:
-            print()
+            player = self.players[player_id]
         
         for _ in range(times):
             if len(self.deck) == 0:
                 self.deck.refillDeck()
-            player.draw(self.deck, side)
+            card = player.draw(self.deck, side)
+            if self.event_sinks:
+                self._emitDraw(dealer, player_id, side, card)
         
-        print(player, '\n')  # Display plaeyr hand status
+        if self.verbose:
+            if dealer:
+                print('Dealer draws', end='')
+            else:
+                print(f'Player {player_id + 1} draws', end='')
+            # If drawing multiple times display multiple
+            if times > 1:
+                print(f' X{times}')
+            else:
+                print()
+            print(player, '\n')  # Display player hand status
     
     def allBust(self):
-        """Checks whether every player has bust (hand value exceeds 21)."""
-        # Look for player who hasn't bust
-        for i in range(self.no_players):
-            if self.people[f'player{i}'].hand.split:
-                if self.people[f'player{i}'].hand.bust[0] == False or self.people[f'player{i}'].hand.bust[1] == False:
-                    return False
-            elif self.people[f'player{i}'].hand.bust == False:
-                return False
-        return True
+        """Checks whether every player has bust (hand value exceeds 21) or
+           surrendered."""
+        return self.table.allBust()
+    
+    def dealerPlays(self):
+        """Checks whether the dealer needs to play out their hand, because a
+           player still has a live hand or an insurance bet to settle."""
+        return not self.allBust() or any(player.hand.insurance for player in self.players)
     
     def divider(self):
-        print('-'*25 + '\n')
+        if self.verbose:
+            print('-'*25 + '\n')
     
-    def calcSplitWinnings(self, player_id=0):
-        """Calculate the final winnings if the players hand has been split this 
-           round.
-
-        Args:
-            player_id (int, optional): the ID of the player's winnings to calculate.
-                                       Defaults to 0.
+    def settleHands(self):
+        """Settles every player's hand against the dealer's, see settlement.py.
+           Each pile of a split hand is settled separately on its own bet.
 
         Returns:
-            int: the total winnings for the player this round.
+            tuple (list of int, list of str): the amount returned to each player
+                                              this round, stake and insurance
+                                              included, and their outcome,
+                                              'win', 'draw' or 'lose', in player
+                                              ID order.
         """
-        player = self.people[f'player{player_id}']
-        winnings = 0
-        
-        if player.hand.split:
-            for i in range(2):
-                # Check hand for win
-                if (player.hand.hand_value[i] > self.people['dealer'].hand.hand_value or \
-                            self.people['dealer'].hand.bust) and not player.hand.bust[i]:
-                    # Record win
-                    winnings += self.player.hand.bet*2
-                # Check hand for draw
-                elif player.hand.hand_value[i] == self.people['dealer'].hand.hand_value or \
-                            player.hand.bust and self.people['dealer'].hand.bust:
-                    # Record draw
-                    winnings += player.hand.bet
-        return winnings
+        dealer = self.dealer.hand.hand_value
+        dealer_natural = self.dealer.hand.natural
+        blackjack_payout = self.rules.blackjack_payout
+        payouts, outcomes = [], []
+        for player in self.players:
+            hand = player.hand
+            if hand.split:
+                payout = 0
+                for hand_value, bet in zip(hand.hand_value, hand.pileBets()):
+                    payout += settleHand(hand_value.best, hand_value.bust, False, bet,
+                                         dealer.best, dealer.bust, dealer_natural,
+                                         blackjack_payout)[0]
+                # The seat's outcome follows the money across both piles
+                net = payout - hand.bet
+                outcome = 'win' if net > 0 else 'draw' if net == 0 else 'lose'
+            else:
+                payout, outcome = settleHand(hand.hand_value.best, hand.hand_value.bust,
+                                             hand.natural, hand.bet, dealer.best,
+                                             dealer.bust, dealer_natural, blackjack_payout,
+                                             hand.surrendered)
+                outcome = OUTCOME_NAMES[outcome]
+            if hand.insurance:
+                payout += settleInsurance(hand.insurance, dealer_natural)
+            payouts.append(payout)
+            outcomes.append(outcome)
+        return payouts, outcomes
     
-    def collectWinnings(self, player_id=0, draw=False):
-        """Collects a players winnings from a round. 
+    def checkWinners(self):
+        """Checks each player against the dealer, pays out their winnings and 
+           prints whether they have won or lost.
 
-        Args:
-            player_id (int, optional): the ID of the player whose hand value should
-                                       be used. If dealer argument is false, 
-                                       player_id is used. Defaults to 0.
-            dealer (bool, optional): whether to use the dealers hand value instead 
-                                     of a players. If
-                                     true, player_id argument irrelevant. Defaults 
-                                     to False.
+        Returns:
+            list of str: the outcome for each player in player ID order, one of 
+                         'win', 'draw' or 'lose'.
         """
-        if self.people[f'player{player_id}'].hand.split:
-            winnings = self.calcSplitWinnings()
-        else:
-            placed_bet = self.people[f'player{player_id}'].hand.bet
-            
-            if draw:
-                winnings = placed_bet
-            else:
-                winnings = placed_bet * 2
+        payouts, outcomes = self.settleHands()
+        # Loop through each player
+        for i in range(self.no_players):
+            player = self.players[i]
+            player.bank += payouts[i]  # Add winnings to player bank
+            outcome = outcomes[i]
+            if self.event_sinks:
+                value = 0 if player.hand.split else player.hand.hand_value.best
+                self.emit('settle', i, value=value, amount=payouts[i], outcome=outcome)
             
-        # Add winnings to player bank
-        self.people[f'player{player_id}'].bank += winnings
+            if self.verbose:
+                if outcome == 'win':
+                    print(f'** Player {i + 1} wins! **')
+                elif outcome == 'draw':
+                    print('** Draw **')
+                else:
+                    print(f'** Player {i + 1} loses **')
+                print()
+        return outcomes
     
-    def checkWinners(self):
-        """Checks each player and prints whether they have won or lost against
-           the dealer."""
-        # Loop through each player
+    def forfeitBets(self):
+        """Settles a round in which every player has bust or surrendered, so
+           every bet is lost, apart from the half returned for a surrender.
+
+        Returns:
+            list of str: 'lose' for each player in player ID order.
+        """
         for i in range(self.no_players):
-            player = self.people[f'player{i}']
-            if player.hand.hand_value > self.people['dealer'].hand.hand_value or \
-                    (self.people['dealer'].hand.bust and not player.hand.bust):
-                print(f'** Player {i + 1} wins! **')
-                self.collectWinnings(i)
-            elif player.hand.hand_value == self.people['dealer'].hand.hand_value or \
-                        player.hand.bust and self.people['dealer'].hand.bust:
-                print('** Draw **')
-                self.collectWinnings(i, draw=True)
-            else:
-                print(f'** Player {i + 1} loses **')
-            print()
+            player = self.players[i]
+            hand = player.hand
+            payout = 0
+            if hand.surrendered:
+                payout = settleHand(hand.hand_value.best, False, False, hand.bet, 0, False,
+                                    False, surrendered=True)[0]
+                player.bank += payout
+            if self.event_sinks:
+                self.emit('settle', i, value=0 if hand.split else hand.hand_value.best,
+                          amount=payout, outcome='lose')
+        return ['lose'] * self.no_players
     
     def reset(self):
-        """Reset each persons hand, ready for a new game."""
-        for person in self.people.values():
-            person.reset()
+        """Reset each persons hand, ready for a new game. The shoe is 
+           reshuffled once the cut card has been reached."""
+        self.table.reset()
+        self.current_side = None
+        self.round_count += 1
+        if self.deck.needsReshuffle():
+            self.deck.refillDeck()
     
     def main(self):
         """Begins the game of command line Blackjack."""
@@ -261,13 +457,17 @@ class Blackjack:
                     bet = int(bet)
                 else:
                     bet = 0
+                if not self.rules.payable(bet):
+                    print(f'Bets must be a multiple of {self.rules.bet_unit}')
+                    bet = 0
      
-                # PLace bet for this hand
-                self.people[f'player{i}'].placeBet(bet)
+                # Place bet for this hand
+                if not self.placeBet(bet, player_id=i):
+                    print('Insufficient funds')
                 
                 # Players play
                 while True:
-                    choice = input('> Hit or stand: ')
+                    choice = input('> Hit, stand, double or surrender: ')
                     print()
 
                     if choice == 'q':
@@ -281,6 +481,21 @@ class Blackjack:
                             print(f'** Player {i + 1} bust! **\n')
                             break
                     elif choice.lower() == "stand" or choice.lower() == "s":
+                        self.playerStands(player_id=i)
+                        break
+                    elif choice.lower() == 'double' or choice.lower() == 'd':
+                        if not self.canDouble(player_id=i):
+                            print('Double not allowed.')
+                            continue
+                        self.double(player_id=i)
+                        if self.playerBust(self.players[i].hand.bust):
+                            print(f'** Player {i + 1} bust! **\n')
+                        break
+                    elif choice.lower() == 'surrender' or choice.lower() == 'r':
+                        if not self.canSurrender(player_id=i):
+                            print('Surrender not allowed.')
+                            continue
+                        self.surrender(player_id=i)
                         break
                     else:
                         print('Please enter an option.')
@@ -290,8 +505,8 @@ class Blackjack:
             self.divider()
             
             # If every player hasn't bust, the dealer begins drawing
-            if not self.allBust():
-                print('Dealer begins drawing...\n{}\n'.format(self.people['dealer']))
+            if self.dealerPlays():
+                print('Dealer begins drawing...\n{}\n'.format(self.dealer))
                 
                 # Dealer draws
                 while self.dealerContinueDraw():
@@ -302,6 +517,8 @@ class Blackjack:
                     print('** Dealer bust! **')
 
                 self.checkWinners()
+            else:
+                self.forfeitBets()
             
             self.reset()
             game_count += 1
@@ -309,7 +526,7 @@ class Blackjack:
     
     def __str__(self):
         string = 'GAME STATUS:\n'
-        for person in self.people.values():
+        for person in self.table.people():
             string += f'{person}\n'
  
         # Print list of cards remaining
@@ -0,0 +1,131 @@
+from functools import lru_cache
+import numpy as np
+from rules import DEFAULT_RULES
+
+
+# Columns of a dealer outcome distribution. A dealer blackjack is a 21 made
+# with the card drawn to the upcard, and is not also counted under '21'.
+DEALER_OUTCOMES = ('17', '18', '19', '20', '21', 'bust', 'blackjack')
+BUST = 5
+BLACKJACK = 6
+
+# Probability of drawing each card value 1 (Ace) to 10 from an infinite deck
+INFINITE_DECK = tuple((value, (4 if value == 10 else 1) / 13) for value in range(1, 11))
+
+
+def fullComposition(no_decks=1):
+    """Card value counts of a complete shoe.
+
+    Args:
+        no_decks (int, optional): number of decks in the shoe. Defaults to 1.
+
+    Returns:
+        tuple of int: number of cards with each value 1 (Ace) to 10.
+    """
+    return (4*no_decks,) * 9 + (16*no_decks,)
+
+
+def drawProbabilities(composition):
+    """Probability of drawing each card value next.
+
+    Args:
+        composition (tuple of int or None): remaining card value counts, or
+                                            None for an infinite deck.
+
+    Returns:
+        tuple of (int, float): each card value that can be drawn paired with
+                               the probability of drawing it.
+    """
+    if composition is None:
+        return INFINITE_DECK
+    total = sum(composition)
+    return tuple((value, count / total)
+                 for value, count in enumerate(composition, start=1) if count)
+
+
+def removeCard(composition, value):
+    """Card value counts after a card of the given value has been dealt."""
+    if composition is None:
+        return None
+    return composition[:value - 1] + (composition[value - 1] - 1,) + composition[value:]
+
+
+def _finalOutcome(best):
+    outcome = [0.0] * len(DEALER_OUTCOMES)
+    if best > 21:
+        outcome[BUST] = 1.0
+    else:
+        outcome[best - 17] = 1.0
+    return tuple(outcome)
+
+
+@lru_cache(maxsize=2**20)
+def _dealerFinal(hard, ace, composition, draws):
+    """Distribution of the dealer's final hand from a hand of at least two
+       cards, drawing by a rule set's dealer table (RuleSet.dealer_draws)."""
+    soft = ace and hard <= 11
+    best = hard + 10 if soft else hard
+    if best > 21 or not draws[soft][best]:
+        return _finalOutcome(best)
+
+    outcome = [0.0] * len(DEALER_OUTCOMES)
+    for value, p in drawProbabilities(composition):
+        result = _dealerFinal(hard + value, ace or value == 1, removeCard(composition, value),
+                              draws)
+        for i, q in enumerate(result):
+            outcome[i] += p * q
+    return tuple(outcome)
+
+
+@lru_cache(maxsize=4096)
+def dealerOutcomes(upcard, composition=None, rules=DEFAULT_RULES):
+    """Exact distribution of where the dealer's hand finishes given their upcard.
+
+    Args:
+        upcard (int): value of the dealer's upcard, 1 (Ace) to 10.
+        composition (tuple of int, optional): card value counts remaining in
+                                              the shoe with the upcard already
+                                              removed, see fullComposition.
+                                              Defaults to None, an infinite deck.
+        rules (RuleSet, optional): the rules the dealer draws by. Defaults to
+                                   the default rules, where the dealer stands
+                                   on soft 17.
+
+    Returns:
+        tuple of float: probability of each outcome in DEALER_OUTCOMES.
+    """
+    outcome = [0.0] * len(DEALER_OUTCOMES)
+    for value, p in drawProbabilities(composition):
+        hard = upcard + value
+        ace = upcard == 1 or value == 1
+        if ace and hard == 11:
+            outcome[BLACKJACK] += p
+            continue
+        result = _dealerFinal(hard, ace, removeCard(composition, value), rules.dealer_draws)
+        for i, q in enumerate(result):
+            outcome[i] += p * q
+    return tuple(outcome)
+
+
+def dealerTable(composition=None, rules=DEFAULT_RULES):
+    """Dealer outcome distributions for every upcard.
+
+    Args:
+        composition (tuple of int, optional): card value counts remaining in
+                                              the shoe before the upcard is
+                                              dealt. Defaults to None, an
+                                              infinite deck.
+        rules (RuleSet, optional): the rules the dealer draws by. Defaults to
+                                   the default rules.
+
+    Returns:
+        numpy array (11, 7): probability of each outcome in DEALER_OUTCOMES
+                             indexed by upcard value (row 0 is unused).
+    """
+    table = np.zeros((11, len(DEALER_OUTCOMES)))
+    for upcard in range(1, 11):
+        if composition is None:
+            table[upcard] = dealerOutcomes(upcard, rules=rules)
+        elif composition[upcard - 1]:
+            table[upcard] = dealerOutcomes(upcard, removeCard(composition, upcard), rules)
+    return table
@@ -0,0 +1,75 @@
+import argparse
+import pygame
+from blackjack import GUIBlackjack
+from replay import Replayer, loadLog, CODE_ACTIONS
+from snapshot import snapshot, restore
+
+
+class GUIReplay(GUIBlackjack):
+    """Steps through a recorded one player session in the GUI. Each press of
+       the space bar or right arrow plays the player's next recorded decision,
+       while dealing and the dealer's turn run on their usual timers.
+
+    Args:
+        replayer (Replayer): replayer of a one player session log.
+        start_round (int, optional): recorded round to start from, reached by
+                                     fast forwarding headlessly. Defaults to 0.
+    """
+    STEP_KEYS = (pygame.K_SPACE, pygame.K_RIGHT)
+
+    def __init__(self, replayer, start_round=0):
+        if replayer.game.no_players != 1:
+            raise ValueError('Only one player sessions can be replayed in the GUI.')
+        super().__init__()
+        self.verbose = False
+        self.replayer = replayer
+        replayer.seek(start_round)
+        restore(snapshot(replayer.game), self)
+        self.player = self.players[0]
+        self.decisions = ''  # Recorded decisions left this round
+
+    @property
+    def position(self):
+        """Number of recorded rounds played so far."""
+        return self.round_count - self.replayer.start_round
+
+    def startRound(self):
+        if self.position >= len(self.replayer):
+            self.state = 'finished'  # End of the recording, leave the last round shown
+            return
+        bet, self.decisions = self.replayer.rounds[self.position][0]
+        super().startRound()
+        self.placeBet(bet)
+
+    def dealPlayerSecondCard(self):
+        super().dealPlayerSecondCard()
+        self.disableAllButtons()  # Decisions come from the recording
+
+    def stepDecision(self):
+        """Plays the player's next recorded decision."""
+        action = CODE_ACTIONS[self.decisions[0]] if self.decisions else 'stand'
+        self.decisions = self.decisions[1:]
+        self.takeAction(self.ACTION_BUTTONS[action])
+        self.action_btns_active = False  # Decisions come from the recording
+
+    def handleEvents(self):
+        """Handles quitting, window exposure and the step keys."""
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                self.quit = True
+            elif event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+                self.redraw_all = True
+            elif event.type == pygame.KEYDOWN and event.key in self.STEP_KEYS:
+                if self.state == 'player_turn':
+                    self.stepDecision()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Step through a recorded session in the GUI.')
+    parser.add_argument('log')
+    parser.add_argument('--round', type=int, default=0, help='recorded round to start from')
+    args = parser.parse_args()
+
+    game = GUIReplay(Replayer(loadLog(args.log)), args.round)
+    game.main()
+    pygame.quit()
@@ -4,117 +4,251 @@ import numpy as np
 
 Card = collections.namedtuple('Card', ['rank', 'suit', 'value'])
 
+RANKS = [str(n) for n in range(2, 11)] + list('JQKA')
+SUITS = ['spades', 'diamonds', 'clubs', 'hearts']
+
+# Cards are encoded as an int 0-51 (rank index * 4 + suit index) and a shoe is 
+# a byte string of these. Lookup arrays indexed by card give its rank index, 
+# suit index and blackjack value, with an Ace valued 1 (it may also count as 11).
+CARD_RANKS = np.repeat(np.arange(len(RANKS), dtype=np.uint8), len(SUITS))
+CARD_SUITS = np.tile(np.arange(len(SUITS), dtype=np.uint8), len(RANKS))
+CARD_VALUES = np.array([2, 3, 4, 5, 6, 7, 8, 9, 10, 10, 10, 10, 1], dtype=np.uint8)[CARD_RANKS]
+
+# Tuple copies of the lookups for fast access with a single card
+VALUES = tuple(CARD_VALUES.tolist())
+CODES = tuple(RANKS[rank] + SUITS[suit][0].upper() 
+              for rank, suit in zip(CARD_RANKS.tolist(), CARD_SUITS.tolist()))
+# Namedtuple view of each card, for display only
+CARDS = tuple(Card(RANKS[rank], SUITS[suit], value) 
+              for rank, suit, value in zip(CARD_RANKS.tolist(), CARD_SUITS.tolist(), VALUES))
+
+# Card counting tags for each card value 1 (Ace) to 10 (index 0 unused)
+COUNTING_SYSTEMS = {
+    'hi-lo': (0, -1, 1, 1, 1, 1, 1, 0, 0, 0, -1),
+    'ko': (0, -1, 1, 1, 1, 1, 1, 1, 0, 0, -1),
+    'omega-ii': (0, 0, 1, 1, 2, 2, 2, 1, 0, -1, -2),
+}
+# Unbalanced systems start the running count away from zero, per deck used
+INITIAL_COUNTS = {'ko': -4}
+
 class Deck:
-    ranks = [str(n) for n in range(2, 11)] + list('JQKA')
-    suits = ['spades', 'diamonds', 'clubs', 'hearts']
-    card_values = {
-        **dict.fromkeys(['2C', '2D', '2H', '2S'], 2), 
-        **dict.fromkeys(['3C', '3D', '3H', '3S'], 3),
-        **dict.fromkeys(['4C', '4D', '4H', '4S'], 4),
-        **dict.fromkeys(['5C', '5D', '5H', '5S'], 5),
-        **dict.fromkeys(['6C', '6D', '6H', '6S'], 6),
-        **dict.fromkeys(['7C', '7D', '7H', '7S'], 7),
-        **dict.fromkeys(['8C', '8D', '8H', '8S'], 8),
-        **dict.fromkeys(['9C', '9D', '9H', '9S'], 9),
-        **dict.fromkeys(['10C', '10D', '10H', '10S',
-                         'JC', 'JD', 'JH', 'JS',
-                         'KC', 'KD', 'KH', 'KS',
-                         'QC', 'QD', 'QH', 'QS'], 10),
-        **dict.fromkeys(['AC', 'AD', 'AH', 'AS'], (1, 11))
-    }
+    ranks = RANKS
+    suits = SUITS
         
-    def __init__(self):
+    def __init__(self, no_decks=1, penetration=1.0, rng=None, counting_system='hi-lo'):
+        """A shuffled pack of cards dealt from the top by advancing a cursor.
+           A card counting running count is kept as each card is dealt.
+
+        Args:
+            no_decks (int, optional): number of 52 card packs shuffled together.
+                                      Defaults to 1.
+            penetration (float, optional): fraction of the cards dealt before
+                                           the cut card is reached and the 
+                                           cards are due a reshuffle. Defaults 
+                                           to 1.0 (deal every card).
+            rng (numpy Generator, optional): random number generator used to
+                                             shuffle. Defaults to a freshly 
+                                             seeded generator.
+            counting_system (str or tuple, optional): name of a system in
+                                                      COUNTING_SYSTEMS, or a tuple
+                                                      of tags for card values 1 
+                                                      to 10 (index 0 unused).
+                                                      Defaults to 'hi-lo'.
+        """
+        self.no_decks = no_decks
+        self.penetration = penetration
+        self.rng = rng if rng is not None else np.random.default_rng()
+        # Every card in the shoe in order, shuffled on each refill
+        self._pack = np.tile(np.arange(len(CODES), dtype=np.uint8), no_decks)
+        self._cards = b''
+        self._position = 0
+        self.setCountingSystem(counting_system)
         self.refillDeck()
     
     def __len__(self):
-        return len(self._cards)
+        """Number of cards remaining to be dealt."""
+        return len(self._cards) - self._position
     
     def __getitem__(self, position):
-        return self._cards[position]
+        return self._cards[self._position:][position]
     
     def __str__(self):
         result = ''
-        for card in self.cards:
-            result += card.rank + card.suit[0].upper() + '\n'
+        for card in self._cards[self._position:]:
+            result += CODES[card] + '\n'
+        return result
+
+    def refillDeck(self):
+        """Collects every card and shuffles them, ready to be dealt again."""
+        self._cards = self.rng.permutation(self._pack).tobytes()
+        self._position = 0  # Index of the next card to be dealt
+        self.cut_card = int(len(self._cards) * self.penetration)
+        self.running_count = self.initial_count
     
-    def getCardValue(self, card):
-        """Takes a card and returns it's numerical value."""
-        card_code = card.rank + card.suit[0].toupper()
-        return self.card_values[card_code]
+    def setCountingSystem(self, counting_system):
+        """Changes the card counting tags, recounting the cards already dealt.
+
+        Args:
+            counting_system (str or tuple): name of a system in COUNTING_SYSTEMS,
+                                            or a tuple of tags for card values.
+        """
+        if type(counting_system) is str:
+            tags = COUNTING_SYSTEMS[counting_system]
+            self.initial_count = INITIAL_COUNTS.get(counting_system, 0) * (self.no_decks - 1)
+        else:
+            tags = tuple(counting_system)
+            self.initial_count = 0
+        self.counting_system = counting_system
+        # Tag of each encoded card, so a draw updates the count with one lookup
+        self._tags = tuple(tags[value] for value in VALUES)
+        self.running_count = self.initial_count + sum(self._tags[card] 
+                                                      for card in self._cards[:self._position])
+    
+    @property
+    def remaining_decks(self):
+        """Number of decks (52 cards) left to be dealt."""
+        return len(self) / 52
     
-    def getCardValue(self, rank, suit):
-        """Takes a card and returns it's numerical value."""
-        card_code = rank + suit[0].upper()
-        return self.card_values[card_code]
+    @property
+    def true_count(self):
+        """Running count per remaining deck."""
+        remaining_decks = self.remaining_decks
+        if remaining_decks == 0:
+            return float(self.running_count)
+        return self.running_count / remaining_decks
+    
+    def composition(self):
+        """Counts the remaining cards of each value.
 
-    def refillDeck(self):
-        self._cards = [Card(rank, suit, self.getCardValue(rank, suit)) 
-                       for rank in self.ranks for suit in self.suits]
+        Returns:
+            tuple of int: number of cards remaining with each value 1 (Ace) 
+                          to 10.
+        """
+        remaining = np.frombuffer(self._cards, dtype=np.uint8)[self._position:]
+        return tuple(np.bincount(CARD_VALUES[remaining], minlength=11)[1:].tolist())
+    
+    def needsReshuffle(self):
+        """Checks whether the cut card has been reached."""
+        return self._position >= self.cut_card
     
     def draw(self):
-        idx = np.random.choice(len(self._cards))
-        idx = 15
-        card = self._cards[idx]
-        #self._cards.remove(card)
+        """Deals the next card."""
+        card = self._cards[self._position]
+        self._position += 1
+        self.running_count += self._tags[card]
         return card
 
 
+class Shoe(Deck):
+    def __init__(self, no_decks=6, penetration=0.75, rng=None, counting_system='hi-lo'):
+        """A dealing shoe of multiple decks with a cut card.
+
+        Args:
+            no_decks (int, optional): number of decks in the shoe, between 1 and 8.
+                                      Defaults to 6.
+            penetration (float, optional): fraction of the shoe dealt before a
+                                           reshuffle. Defaults to 0.75.
+            rng (numpy Generator, optional): random number generator used to
+                                             shuffle.
+            counting_system (str or tuple, optional): card counting tags, see 
+                                                      Deck. Defaults to 'hi-lo'.
+        """
+        if not 1 <= no_decks <= 8:
+            raise ValueError('A shoe must hold between 1 and 8 decks.')
+        if not 0 < penetration <= 1:
+            raise ValueError('Penetration must be greater than 0 and at most 1.')
+        super().__init__(no_decks, penetration, rng, counting_system)
+
+
+class HandValue:
+    """Value of a pile of cards, kept as the hard total (every Ace counted as 1)
+       and whether an Ace is held. Adding a card is constant time, and one Ace
+       is counted as 11 whenever that doesn't bust the hand (a soft hand)."""
+    __slots__ = ('hard', 'ace', 'no_cards')
+    
+    def __init__(self, cards=()):
+        self.hard = 0
+        self.ace = False
+        self.no_cards = 0
+        for card in cards:
+            self.add(card)
+    
+    def add(self, card):
+        """Add the value of the input card to the hand value."""
+        value = VALUES[card]
+        self.hard += value
+        if value == 1:
+            self.ace = True
+        self.no_cards += 1
+    
+    @property
+    def soft(self):
+        """Whether an Ace is currently counted as 11."""
+        return self.ace and self.hard <= 11
+    
+    @property
+    def best(self):
+        """The highest total of the hand that doesn't bust, if there is one."""
+        if self.ace and self.hard <= 11:
+            return self.hard + 10
+        return self.hard
+    
+    @property
+    def bust(self):
+        return self.hard > 21
+    
+    @property
+    def natural(self):
+        """Whether the hand is a two card 21 (blackjack)."""
+        return self.no_cards == 2 and self.best == 21
+    
+    def __str__(self):
+        """Hand value as displayed in game, e.g. '7 or 17' for a soft hand."""
+        best = self.best
+        if best != self.hard and best != 21:
+            return f'{self.hard} or {best}'
+        return str(best)
+
+
 class Hand:
     def __init__(self):
         self.bet = 0
-        self.cards = []  # List of card objects
-        self.hand_value = (0,)  # Tuple containing possible values of this hand
+        self.cards = []  # List of cards, encoded as ints
+        self.hand_value = HandValue()  # Pair of HandValues, left and right, if split
         self.bust = False
         self.split = False
+        self.doubled = False  # Pair of flags, left and right, if split
+        self.surrendered = False
+        self.insurance = 0  # Insurance bet, taken as a side bet to the hand's bet
+    
+    @property
+    def natural(self):
+        """Whether the hand is a blackjack. A split hand can't be a blackjack."""
+        return not self.split and self.hand_value.natural
+    
+    def pileBets(self):
+        """The bet on each pile of a split hand. The piles share the hand's bet
+           equally, with a pile's share doubled if it has doubled down."""
+        left, right = self.doubled
+        base = self.bet // (2 + left + right)
+        return base * (1 + left), base * (1 + right)
     
     def addToHandValue(self, card, side=None):
         """Add the value of the input card to the current hand value."""
-        # Get current hand value(s) to update
-        hand_values = None
-        if self.split and side != None:
+        if self.split:
             if side == 'left':
-                hand_values = self.hand_value[0]
+                self.hand_value[0].add(card)
             elif side == 'right':
-                hand_values = self.hand_value[1]
+                self.hand_value[1].add(card)
         else:
-            hand_values = self.hand_value
-        
-        # Recalulate the new hand value(s)
-        if hand_values is not None:
-            new_hand_value = set()  # Collect unique hand values
-            if type(card.value) is tuple:  # If more than one card value (drawn Ace)
-                # Add each card value to each current hand value
-                # E.g. hand value can be 6 or 16 due to holding an Ace
-                #      new card value could be 1 or 10 (an Ace)
-                #      new hand value would be 7, 16, 17 or 26
-                for hand_value in hand_values:
-                    for value in card.value:
-                        new_hand_value.add(hand_value + value)
-            else:
-                for hand_value in hand_values:
-                    new_hand_value.add(hand_value + card.value)
-                    
-            # Save result as tuple
-            if self.split and side != None:
-                if side == 'left':
-                    self.hand_value = tuple((tuple(new_hand_value), self.hand_value[1]))
-                elif side == 'right':
-                    self.hand_value = tuple((self.hand_value[0], tuple(new_hand_value)))
-            else:
-                self.hand_value = tuple(new_hand_value) 
+            self.hand_value.add(card)
     
     def calcHandValue(self):
         """Calculate the value of the entire hand from scratch."""
         if self.split:
-            self.hand_value = ((0,), (0,))
-            for card in self.cards[0]:
-                self.add_to_hand_value(card, side='left')
-            for card in self.cards[1]:
-                self.add_to_hand_value(card, side='right')
+            self.hand_value = (HandValue(self.cards[0]), HandValue(self.cards[1]))
         else:
-            self.hand_value = (0,)
-            for card in self.cards:
-                self.add_to_hand_value(card)
+            self.hand_value = HandValue(self.cards)
     
     def __str__(self):
         string = ''
@@ -136,19 +270,13 @@ class Hand:
                 string += 'None '
             else:
                 for card in cards[i]:
-                    string += card.rank + card.suit[0].upper() + ' '
+                    string += CODES[card] + ' '
             
-            # Format and add hand value(s) separates by spaces
-            hand_value_str = ''
-            for idx, value in enumerate(hand_value[i]):
-                hand_value_str += str(value)
-                if idx < len(hand_value[i]) - 1:
-                    hand_value_str += ' or '
             # Add the current hand total to string
-            string += f'(={hand_value_str})'
+            string += f'(={hand_value[i]})'
             
             # Add a separator between hands if split
             if no_hands == 2 and i == 0:
                 string += ' -//- '
             
-        return string
\ No newline at end of file
+        return string
@@ -0,0 +1,160 @@
+from collections import deque, namedtuple
+import json
+import struct
+import threading
+
+
+# One thing that happened at the table. seat is -1 for the dealer, side is
+# 'left' or 'right' when a split hand acts, card is the encoded card drawn
+# (-1 if none), value is the hand's best total after the event, amount is the
+# bet placed, the extra bet of a double or insurance, or the winnings paid, and
+# outcome is 'win', 'draw' or 'lose' when settled. A double records the one
+# card it draws.
+Event = namedtuple('Event', 'kind round_no seat side card value amount outcome')
+
+EVENT_KINDS = ('bet', 'deal', 'hit', 'stand', 'split', 'dealer_draw', 'settle', 'double',
+               'surrender', 'insurance')
+SIDES = (None, 'left', 'right')
+OUTCOMES = (None, 'win', 'draw', 'lose')
+
+
+class RingBufferSink:
+    """Keeps the most recent events in memory.
+
+    Args:
+        maxlen (int, optional): number of events kept. Defaults to 10000.
+    """
+
+    def __init__(self, maxlen=10000):
+        self.buffer = deque(maxlen=maxlen)
+
+    def write(self, event):
+        self.buffer.append(event)
+
+    def events(self):
+        """The events held, oldest first."""
+        return list(self.buffer)
+
+    def close(self):
+        pass
+
+
+class JSONLSink:
+    """Writes events to a file as one JSON object per line, in buffered batches.
+
+    Args:
+        path (str): file to write to.
+        buffer_size (int, optional): events held before writing. Defaults to 1024.
+    """
+
+    def __init__(self, path, buffer_size=1024):
+        self.file = open(path, 'w')
+        self.buffer_size = buffer_size
+        self._lines = []
+
+    def write(self, event):
+        self._lines.append(json.dumps(event._asdict()))
+        if len(self._lines) >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        if self._lines:
+            self.file.write('\n'.join(self._lines) + '\n')
+            self._lines = []
+        self.file.flush()
+
+    def close(self):
+        self.flush()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class BinarySink:
+    """Writes events to a file as fixed size binary records. Records are
+       batched in memory and written by a background thread whenever a batch
+       fills or the flush interval passes, so the game never waits on the disk.
+
+    Args:
+        path (str): file to write to.
+        batch_size (int, optional): records per batch. Defaults to 4096.
+        flush_interval (float, optional): most seconds a record waits before
+                                          being written. Defaults to 1.
+    """
+    MAGIC = b'BJHH'
+    VERSION = 1
+    RECORD = struct.Struct('<BIhbbBqb')  # kind, round, seat, side, card, value, amount, outcome
+
+    def __init__(self, path, batch_size=4096, flush_interval=1.0):
+        self.file = open(path, 'wb')
+        self.file.write(self.MAGIC + struct.pack('<H', self.VERSION))
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._batch = []
+        self._lock = threading.Lock()
+        self._batch_full = threading.Event()
+        self._closing = False
+        self._thread = threading.Thread(target=self._flushLoop, daemon=True)
+        self._thread.start()
+
+    def write(self, event):
+        record = self.RECORD.pack(EVENT_KINDS.index(event.kind), event.round_no, event.seat,
+                                  SIDES.index(event.side), event.card, event.value,
+                                  event.amount, OUTCOMES.index(event.outcome))
+        with self._lock:
+            self._batch.append(record)
+            if len(self._batch) >= self.batch_size:
+                self._batch_full.set()
+
+    def _writeBatch(self):
+        with self._lock:
+            batch, self._batch = self._batch, []
+        if batch:
+            self.file.write(b''.join(batch))
+            self.file.flush()
+
+    def _flushLoop(self):
+        while not self._closing:
+            self._batch_full.wait(self.flush_interval)
+            self._batch_full.clear()
+            self._writeBatch()
+
+    def close(self):
+        """Writes any remaining records and stops the background thread."""
+        self._closing = True
+        self._batch_full.set()
+        self._thread.join()
+        self._writeBatch()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def readBinary(path):
+    """Reads back the events written by a BinarySink.
+
+    Args:
+        path (str): file written by a BinarySink.
+
+    Yields:
+        Event: each event in the order it was written.
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    if data[:4] != BinarySink.MAGIC:
+        raise ValueError('Not a Blackjack hand history file.')
+    version, = struct.unpack_from('<H', data, 4)
+    if version != BinarySink.VERSION:
+        raise ValueError(f'Unsupported hand history version {version}.')
+    for kind, round_no, seat, side, card, value, amount, outcome in \
+            BinarySink.RECORD.iter_unpack(data[6:]):
+        yield Event(EVENT_KINDS[kind], round_no, seat, SIDES[side], card, value, amount,
+                    OUTCOMES[outcome])
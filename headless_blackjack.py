@@ -0,0 +1,181 @@
+from collections import namedtuple
+from cli_blackjack import Blackjack
+from policies import HandView
+
+
+# Structured record of a single completed round
+RoundResult = namedtuple('RoundResult', 'round_no dealer_value dealer_bust players')
+PlayerResult = namedtuple('PlayerResult', 'player_id bet hand_value bust outcome bank')
+
+
+def mimicDealer(game, player_id):
+    """Default player decision, hit on anything below 17 like the dealer.
+
+    Args:
+        game (HeadlessBlackjack): the game being played.
+        player_id (int): the ID of the player making the decision.
+
+    Returns:
+        str: the chosen action, 'hit' or 'stand'.
+    """
+    if game.players[player_id].hand.hand_value.best < 17:
+        return 'hit'
+    return 'stand'
+
+
+class HeadlessBlackjack(Blackjack):
+    """Blackjack rules engine that plays complete rounds with no console
+       input/output and no pauses, for running simulations."""
+
+    def __init__(self, no_players=1, player_bank=1000, no_decks=6, penetration=0.75,
+                 rng=None, rules=None):
+        super().__init__(no_players, player_bank, no_decks, penetration, verbose=False,
+                         rng=rng, rules=rules)
+
+    def playRound(self, bets=None, decide=None):
+        """Plays a complete round: deals, lets each player act, plays out the
+           dealer's hand and settles every bet.
+
+        Args:
+            bets (int or list of int, optional): the bet placed by each player.
+                                                 A single int is used for every
+                                                 player. Each must be a
+                                                 multiple of the rules'
+                                                 bet_unit. Defaults to each
+                                                 player's policy bet, or the
+                                                 bet_unit.
+            decide (callable, optional): called as decide(game, player_id) and
+                                         returns 'hit', 'stand', 'split',
+                                         'double', 'surrender' or 'insurance'.
+                                         After taking insurance it is called
+                                         again for the hand's play. After a
+                                         split it is called for each pile in
+                                         turn, with game.current_side set. An
+                                         action the rules don't allow stands.
+                                         Defaults to each player's policy, or
+                                         mimicDealer.
+
+        Returns:
+            RoundResult: the final dealer hand and the result for each player.
+
+        Raises:
+            ValueError: if a bet is not a multiple of the rules' bet_unit, so its
+                        payouts could not be paid in whole chips.
+        """
+        if bets is None:
+            bets = [player.policy.bet(HandView(self, i)) if player.policy
+                    else self.rules.bet_unit for i, player in enumerate(self.players)]
+        elif type(bets) is int:
+            bets = [bets] * self.no_players
+        for bet in bets:
+            if not self.rules.payable(bet):
+                raise ValueError(f'Bet {bet} is not a multiple of the bet unit '
+                                 f'{self.rules.bet_unit}.')
+        decides = [decide or player.policy or mimicDealer for player in self.players]
+
+        # Dealer init
+        self.personDraws(dealer=True)
+
+        for i in range(self.no_players):
+            # Players init
+            self.personDraws(player_id=i, times=2)
+            self.placeBet(bets[i], player_id=i)
+
+            # Players play
+            action = decides[i](self, i)
+            if action == 'insurance' and self.canInsure(i):
+                self.insure(i)
+                action = decides[i](self, i)
+            if action == 'split' and self.canSplit(i):
+                self.split(i)
+                self.playSplitHand(i, decides[i])
+                continue
+            if action == 'double' and self.canDouble(i):
+                self.double(i)
+                continue
+            if action == 'surrender' and self.canSurrender(i):
+                self.surrender(i)
+                continue
+            while action == 'hit':
+                self.personDraws(player_id=i)
+                if self.calcBust(player_id=i):
+                    break
+                action = decides[i](self, i)
+            else:
+                self.playerStands(player_id=i)
+
+        # Unless every player has bust, the dealer draws and bets are settled
+        if self.dealerPlays():
+            while self.dealerContinueDraw():
+                self.personDraws(dealer=True)
+            self.calcBust(dealer=True)
+            outcomes = self.checkWinners()
+        else:
+            outcomes = self.forfeitBets()
+
+        dealer = self.dealer
+        players = []
+        for i in range(self.no_players):
+            player = self.players[i]
+            if player.hand.split:
+                hand_value = tuple(value.best for value in player.hand.hand_value)
+            else:
+                hand_value = player.hand.hand_value.best
+            players.append(PlayerResult(player_id=i, bet=player.hand.bet,
+                                        hand_value=hand_value,
+                                        bust=self.playerBust(player.hand.bust),
+                                        outcome=outcomes[i], bank=player.bank))
+        result = RoundResult(round_no=self.round_count,
+                             dealer_value=dealer.hand.hand_value.best,
+                             dealer_bust=dealer.hand.bust, players=players)
+
+        self.reset()
+        return result
+
+    def playSplitHand(self, player_id, decide):
+        """Plays both piles of a split hand, the left pile then the right."""
+        hand = self.players[player_id].hand
+        for pile, side in enumerate(('left', 'right')):
+            self.current_side = side
+            action = decide(self, player_id)
+            while action == 'hit':
+                self.personDraws(player_id=player_id, side=side)
+                self.calcBust(player_id=player_id)
+                if hand.hand_value[pile].bust:
+                    break
+                action = decide(self, player_id)
+            else:
+                if action == 'double' and self.canDouble(player_id):
+                    self.double(player_id)
+                else:
+                    self.playerStands(player_id=player_id)
+        self.current_side = None
+
+    def simulate(self, rounds, bet=None, decide=None):
+        """Plays a number of rounds back to back and tallies the results.
+
+        Args:
+            rounds (int): number of rounds to play.
+            bet (int, optional): the bet placed by each player every round.
+                                 Defaults to each player's policy bet, or the
+                                 rules' bet_unit.
+            decide (callable, optional): player decision function, see playRound.
+                                         Defaults to each player's policy, or
+                                         mimicDealer.
+
+        Returns:
+            dict: total number of rounds played, player hands won, drawn, lost
+                  and bust, and the players' combined change in bank.
+        """
+        start_bank = sum(self.players[i].bank for i in range(self.no_players))
+        totals = {'rounds': 0, 'win': 0, 'draw': 0, 'lose': 0, 'bust': 0}
+        for _ in range(rounds):
+            result = self.playRound(bet, decide)
+            totals['rounds'] += 1
+            for player in result.players:
+                totals[player.outcome] += 1
+                if player.bust:
+                    totals['bust'] += 1
+        end_bank = sum(self.players[i].bank for i in range(self.no_players))
+        totals['net'] = end_bank - start_bank
+        return totals
@@ -0,0 +1,203 @@
+import functools
+import importlib
+import importlib.abc
+import importlib.machinery
+import json
+import sys
+import threading
+import time
+
+
+# Hot paths that can be instrumented, as (module, class, method). GUI paths
+# are instrumented when the GUI module is imported, which may be after
+# instrumentation is enabled, so enabling it never pulls in pygame itself.
+HOT_PATHS = [
+    ('hand', 'Deck', 'draw'),
+    ('people', 'Person', 'draw'),
+    ('cli_blackjack', 'Blackjack', 'calcBust'),
+    ('cli_blackjack', 'Blackjack', 'dealerContinueDraw'),
+    ('cli_blackjack', 'Blackjack', 'checkWinners'),
+    ('cli_blackjack', 'Blackjack', 'reset'),  # Once per round
+    ('blackjack', 'GUIBlackjack', 'display'),
+    ('blackjack', 'GUIBlackjack', 'handleEvents'),
+]
+GUI_MODULES = {'blackjack'}
+
+# Counters reported in each snapshot, as the number of calls to a hot path
+COUNTERS = {'cards_dealt': 'Deck.draw', 'rounds': 'Blackjack.reset'}
+
+
+class _ImportHook(importlib.abc.MetaPathFinder):
+    """Instruments a module's hot paths as soon as it is imported."""
+
+    def __init__(self, instrumentation, module_names):
+        self.instrumentation = instrumentation
+        self.module_names = module_names
+
+    def find_spec(self, name, path, target=None):
+        if name not in self.module_names:
+            return None
+        spec = importlib.machinery.PathFinder.find_spec(name, path)
+        if spec is None or spec.loader is None:
+            return None
+        execute = spec.loader.exec_module
+
+        def executeAndInstrument(module):
+            execute(module)
+            self.module_names.discard(name)
+            self.instrumentation._wrapModule(name)
+        spec.loader.exec_module = executeAndInstrument
+        return spec
+
+
+class Histogram:
+    """Counts durations in logarithmic buckets, one per power of two
+       nanoseconds, so recording is constant time and memory is fixed."""
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.buckets = [0] * 64
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds):
+        self.buckets[min(int(seconds * 1e9).bit_length(), 63)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, q):
+        """Upper bound of the bucket holding the q-th percentile, in seconds."""
+        if not self.count:
+            return 0.0
+        target = q / 100 * self.count
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            seen += n
+            if seen >= target:
+                return min(2**i / 1e9, self.max)
+        return self.max
+
+    def summary(self, elapsed):
+        return {'calls': self.count,
+                'per_sec': self.count / elapsed if elapsed else 0.0,
+                'mean': self.total / self.count if self.count else 0.0,
+                'p50': self.percentile(50), 'p90': self.percentile(90),
+                'p99': self.percentile(99), 'max': self.max}
+
+
+class Instrumentation:
+    """Counters and timing histograms for the game's hot paths.
+
+       Enabling wraps each hot path method on its class with a timed version
+       and disabling puts the original methods back, so there is no overhead
+       at all while instrumentation is off.
+
+    Args:
+        paths (list of tuple, optional): hot paths as (module, class, method).
+                                         Defaults to HOT_PATHS.
+    """
+
+    def __init__(self, paths=None):
+        self.paths = HOT_PATHS if paths is None else paths
+        self.histograms = {}  # {'Class.method' : Histogram}
+        self.start_time = None
+        self._originals = []  # [(class, method name, original function)]
+        self._import_hook = None
+        self._dump_thread = None
+        self._dump_stop = threading.Event()
+
+    @property
+    def enabled(self):
+        return bool(self._originals) or self._import_hook is not None
+
+    def _timed(self, function, histogram):
+        @functools.wraps(function)
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            result = function(*args, **kwargs)
+            histogram.record(time.perf_counter() - start)
+            return result
+        return timed
+
+    def _wrapModule(self, module_name):
+        module = sys.modules[module_name]
+        for path_module, class_name, method in self.paths:
+            if path_module != module_name:
+                continue
+            cls = getattr(module, class_name)
+            original = cls.__dict__[method]
+            name = f'{class_name}.{method}'
+            histogram = self.histograms.setdefault(name, Histogram())
+            setattr(cls, method, self._timed(original, histogram))
+            self._originals.append((cls, method, original))
+
+    def enable(self):
+        """Starts timing every hot path. GUI modules not yet imported are
+           instrumented when they are."""
+        if self.enabled:
+            return
+        self.start_time = time.perf_counter()
+        pending = set()
+        for module_name in dict.fromkeys(path[0] for path in self.paths):
+            if module_name in GUI_MODULES and module_name not in sys.modules:
+                pending.add(module_name)
+                continue
+            importlib.import_module(module_name)
+            self._wrapModule(module_name)
+        if pending:
+            self._import_hook = _ImportHook(self, pending)
+            sys.meta_path.insert(0, self._import_hook)
+
+    def disable(self):
+        """Restores the original hot path methods."""
+        if self._import_hook is not None:
+            sys.meta_path.remove(self._import_hook)
+            self._import_hook = None
+        for cls, method, original in reversed(self._originals):
+            setattr(cls, method, original)
+        self._originals = []
+
+    def reset(self):
+        """Clears every histogram, and so every counter."""
+        for histogram in self.histograms.values():
+            histogram.clear()
+        self.start_time = time.perf_counter()
+
+    def snapshot(self):
+        """Current counters and timings.
+
+        Returns:
+            dict: seconds since enabled, the counters in COUNTERS and, for each
+                  hot path, its calls, calls per second and mean, p50, p90, p99
+                  and max latency in seconds.
+        """
+        elapsed = time.perf_counter() - self.start_time if self.start_time else 0.0
+        counters = {counter: self.histograms[name].count if name in self.histograms else 0
+                    for counter, name in COUNTERS.items()}
+        return {'elapsed': elapsed, 'counters': counters,
+                'timings': {name: histogram.summary(elapsed)
+                            for name, histogram in self.histograms.items()}}
+
+    def dumpEvery(self, interval, stream=sys.stderr):
+        """Writes a snapshot as a JSON line every interval seconds from a
+           background thread, until stopDump is called."""
+        self.stopDump()
+        self._dump_stop.clear()
+
+        def dump():
+            while not self._dump_stop.wait(interval):
+                stream.write(json.dumps(self.snapshot()) + '\n')
+                stream.flush()
+        self._dump_thread = threading.Thread(target=dump, daemon=True)
+        self._dump_thread.start()
+
+    def stopDump(self):
+        if self._dump_thread is not None:
+            self._dump_stop.set()
+            self._dump_thread.join()
+            self._dump_thread = None
@@ -0,0 +1,98 @@
+import argparse
+import asyncio
+import time
+import numpy as np
+
+
+async def playSession(reader, writer, rounds, bet, stand_on, latencies):
+    """Plays rounds as one player, timing each command until the server's reply.
+
+    Args:
+        reader, writer: the connection to the server.
+        rounds (int): number of rounds to play before quitting.
+        bet (int): bet placed every round.
+        stand_on (int): stand once the hand's best total reaches this.
+        latencies (list of float): each action's latency in seconds is appended.
+
+    Returns:
+        int: number of rounds played.
+    """
+    played = 0
+    sent = None  # Time the awaited command was sent
+
+    def send(line):
+        nonlocal sent
+        sent = time.perf_counter()
+        writer.write(line.encode() + b'\n')
+
+    send('JOIN')
+    while played < rounds:
+        line = await reader.readline()
+        if not line:
+            break
+        message = line.decode().split()
+        if sent is not None and message[0] in ('OK', 'CARD', 'WELCOME', 'ERROR'):
+            latencies.append(time.perf_counter() - sent)
+            sent = None
+
+        if message[0] == 'BETS':
+            send(f'BET {bet}')
+        elif message[0] == 'TURN':
+            send('HIT' if int(message[1]) < stand_on else 'STAND')
+        elif message[0] == 'RESULT':
+            played += 1
+    writer.write(b'QUIT\n')
+    await writer.drain()
+    writer.close()
+    return played
+
+
+async def runLoad(sessions, rounds, host='127.0.0.1', port=8765, path=None, bet=2,
+                  stand_on=17):
+    """Connects many players at once and plays rounds on every connection.
+
+    Args:
+        sessions (int): number of concurrent players.
+        rounds (int): rounds each player plays.
+        host (str, optional): server TCP address. Defaults to 127.0.0.1.
+        port (int, optional): server TCP port. Defaults to 8765.
+        path (str, optional): connect to this Unix socket instead of TCP.
+        bet (int, optional): bet placed every round, a multiple of the table's
+                             bet unit. Defaults to 2, the unit at 3:2.
+        stand_on (int, optional): players stand on this total. Defaults to 17.
+
+    Returns:
+        dict: p50 and p99 action latency in ms, rounds played and rounds/sec.
+    """
+    async def connect():
+        if path is not None:
+            return await asyncio.open_unix_connection(path)
+        return await asyncio.open_connection(host, port)
+
+    connections = await asyncio.gather(*(connect() for _ in range(sessions)))
+    latencies = []
+    start = time.perf_counter()
+    played = await asyncio.gather(*(playSession(reader, writer, rounds, bet, stand_on,
+                                                latencies)
+                                    for reader, writer in connections))
+    elapsed = time.perf_counter() - start
+
+    p50, p99 = np.percentile(latencies, (50, 99)) * 1000 if latencies else (0.0, 0.0)
+    return {'sessions': sessions, 'rounds': sum(played), 'actions': len(latencies),
+            'p50_ms': p50, 'p99_ms': p99, 'rounds_per_sec': sum(played) / elapsed}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Load generator for the Blackjack server.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--unix', default=None, help='Unix socket path to connect to')
+    parser.add_argument('--sessions', type=int, default=100)
+    parser.add_argument('--rounds', type=int, default=20)
+    args = parser.parse_args()
+
+    report = asyncio.run(runLoad(args.sessions, args.rounds, args.host, args.port, args.unix))
+    print(f"{report['sessions']} sessions, {report['rounds']} rounds, "
+          f"{report['actions']} actions")
+    print(f"Action latency p50 {report['p50_ms']:.2f} ms, p99 {report['p99_ms']:.2f} ms")
+    print(f"{report['rounds_per_sec']:.0f} rounds/sec")
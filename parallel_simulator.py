@@ -0,0 +1,170 @@
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from headless_blackjack import HeadlessBlackjack, mimicDealer
+from rules import DEFAULT_RULES
+
+# Rounds played from each seeded sub-stream. Rounds are split into chunks of
+# this size whatever the number of workers, so results depend only on the seed.
+CHUNK_ROUNDS = 10000
+# Bank of every simulated player, large enough never to limit a double or split
+SIMULATION_BANK = 2**62
+
+
+class SimulationResults:
+    """Aggregated results of simulated rounds. Results from separate workers
+       are combined with merge (or +), which is exact as every total is an int."""
+
+    fields = ('rounds', 'hands', 'wins', 'draws', 'losses', 'busts', 'dealer_busts',
+              'net', 'net_squared')
+
+    def __init__(self, **totals):
+        for field in self.fields:
+            setattr(self, field, totals.get(field, 0))
+
+    def merge(self, other):
+        """Combines these results with another set of results."""
+        return SimulationResults(**{field: getattr(self, field) + getattr(other, field)
+                                    for field in self.fields})
+
+    __add__ = merge
+
+    @property
+    def ev(self):
+        """Average bank change per hand."""
+        return self.net / self.hands if self.hands else 0.0
+
+    @property
+    def std(self):
+        """Standard deviation of the bank change per hand."""
+        if not self.hands:
+            return 0.0
+        return max(self.net_squared / self.hands - self.ev**2, 0) ** 0.5
+
+    @property
+    def bust_rate(self):
+        return self.busts / self.hands if self.hands else 0.0
+
+    def asDict(self):
+        totals = {field: getattr(self, field) for field in self.fields}
+        totals.update(ev=self.ev, std=self.std, bust_rate=self.bust_rate)
+        return totals
+
+    def __eq__(self, other):
+        return self.asDict() == other.asDict()
+
+    def __str__(self):
+        return (f'{self.rounds} rounds, {self.hands} hands: {self.wins} won, '
+                f'{self.draws} drawn, {self.losses} lost ({self.busts} bust), '
+                f'EV {self.ev:+.5f} ± {self.std:.5f} per hand')
+
+
+def simulateChunk(seed_sequence, rounds, no_players=1, bet=None, no_decks=6,
+                  penetration=0.75, decide=mimicDealer, rules=None):
+    """Plays rounds on a single headless table with its own random stream.
+
+       Each player's bank is effectively unlimited, so the strategy played
+       never depends on how many rounds the table has played.
+
+    Args:
+        seed_sequence (numpy SeedSequence): seed for this table's shoe shuffles.
+        rounds (int): number of rounds to play.
+        no_players (int, optional): players at the table. Defaults to 1.
+        bet (int, optional): each player's bet every round. Defaults to the
+                             rules' bet_unit.
+        no_decks (int, optional): decks in the shoe. Defaults to 6.
+        penetration (float, optional): shoe penetration. Defaults to 0.75.
+        decide (callable, optional): player decision function, must be picklable.
+                                     Defaults to mimicDealer.
+        rules (RuleSet, optional): the table rules, see rules.py. Defaults to
+                                   the default rules.
+
+    Returns:
+        SimulationResults: the totals of the rounds played.
+    """
+    if bet is None:
+        bet = (rules or DEFAULT_RULES).bet_unit
+    rng = np.random.default_rng(seed_sequence)
+    game = HeadlessBlackjack(no_players, SIMULATION_BANK, no_decks, penetration, rng=rng,
+                             rules=rules)
+    results = SimulationResults()
+    banks = [SIMULATION_BANK] * no_players
+    for _ in range(rounds):
+        result = game.playRound(bet, decide)
+        results.rounds += 1
+        results.dealer_busts += result.dealer_bust
+        for player in result.players:
+            results.hands += 1
+            if player.outcome == 'win':
+                results.wins += 1
+            elif player.outcome == 'draw':
+                results.draws += 1
+            else:
+                results.losses += 1
+            results.busts += player.bust
+            # Bank change this round
+            net = player.bank - banks[player.player_id]
+            banks[player.player_id] = player.bank
+            results.net += net
+            results.net_squared += net * net
+    return results
+
+
+def runParallel(rounds, workers=None, seed=None, no_players=1, bet=None, no_decks=6,
+                penetration=0.75, decide=mimicDealer, rules=None, chunk_rounds=CHUNK_ROUNDS):
+    """Fans rounds out across a process pool, as independent tables of
+       chunk_rounds rounds each.
+
+       Each table's shuffles come from its own stream spawned from a single
+       master seed, and the rounds are split into tables the same way whatever
+       the number of workers, so results are identical for a given seed.
+
+    Args:
+        rounds (int): total number of rounds to play.
+        workers (int, optional): number of worker processes. Defaults to the
+                                 number of CPUs.
+        seed (int, optional): master seed. Defaults to fresh OS entropy.
+        chunk_rounds (int, optional): rounds played on each table. Defaults to
+                                      CHUNK_ROUNDS.
+        See simulateChunk for the remaining table arguments.
+
+    Returns:
+        tuple (SimulationResults, int): merged results of every table and the
+                                        master seed used.
+    """
+    if workers is None:
+        workers = os.cpu_count()
+    master = np.random.SeedSequence(seed)
+    no_chunks = max(-(-rounds // chunk_rounds), 1)
+    seeds = master.spawn(no_chunks)
+    # Every table plays chunk_rounds rounds, apart from the last
+    chunks = [min(chunk_rounds, rounds - i * chunk_rounds) for i in range(no_chunks)]
+
+    results = SimulationResults()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(simulateChunk, seeds[i], chunks[i], no_players, bet,
+                                   no_decks, penetration, decide, rules)
+                   for i in range(no_chunks)]
+        # Merge in table order
+        for future in futures:
+            results = results.merge(future.result())
+    return results, master.entropy
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Parallel headless Blackjack simulation.')
+    parser.add_argument('rounds', type=int)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--players', type=int, default=1)
+    parser.add_argument('--decks', type=int, default=6)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    results, seed = runParallel(args.rounds, args.workers, args.seed, args.players,
+                                no_decks=args.decks)
+    elapsed = time.perf_counter() - start
+    print(results)
+    print(f'Seed {seed}, {args.rounds / elapsed:.0f} rounds/sec')
@@ -1,4 +1,4 @@
-from hand import Hand, Card
+from hand import Hand
 import numpy as np
 from itertools import count
 
@@ -23,40 +23,9 @@ class Person:
             self.hand.cards.append(card)  # Add card to hand
             
         self.hand.addToHandValue(card, side)  # Update hand total
-        self.tidyHandValue()
         
         return card
     
-    def tidyHandValue(self):
-        """Remove any excess hand values over 21."""
-        # Remove any bust hand values if more than one hand value option exists
-        if self.hand.split:
-            new_hand_value = []
-            for i in range(2):
-                if len(self.hand.hand_value[i]) > 1:
-                    for hand_value in self.hand.hand_value[i]:
-                        if hand_value == 21:
-                            new_hand_value = [21]  # Overwrite hand value, only keep 21
-                            break
-                        elif hand_value <= 21:
-                            new_hand_value[i].append(hand_value)
-
-            if len(self.hand.hand_value[0]) > 1 or len(self.hand.hand_value[1]) > 1:
-                # Update player's hand value
-                self.hand.hand_value = tuple(new_hand_value)
-        else:
-            if len(self.hand.hand_value) > 1:
-                new_hand_value = []
-                for hand_value in self.hand.hand_value:
-                    if hand_value == 21:
-                        new_hand_value = [21]  # Overwrite hand value, only keep 21
-                        break
-                    elif hand_value <= 21:
-                        new_hand_value.append(hand_value)
-                        
-                # Update player's hand value
-                self.hand.hand_value = tuple(new_hand_value)
-    
     def reset(self):
         self.hand = Hand()
     
@@ -72,15 +41,20 @@ class Player(Person):
         
         self.id = next(self._ids)
         self.bank = bank
+        self.policy = None  # Decides bets and actions for an automated player, see policies.py
 
     def placeBet(self, bet):
         """Places the input bet amount as a bet on the players current hand and
-           withdraws that amount from their bank."""
+           withdraws that amount from their bank.
+
+        Returns:
+            boolean: whether the player had sufficient funds to place the bet.
+        """
         if self.bank - bet < 0:
-            print('Insufficient funds')
-        else:
-            self.hand.bet += bet
-            self.bank -= bet
+            return False
+        self.hand.bet += bet
+        self.bank -= bet
+        return True
     
     def __str__(self):
         return f'Player {self.id + 1} -> ' + super().__str__() + f', Bank: {self.bank}'
@@ -0,0 +1,348 @@
+import numpy as np
+from actions import STAND, HIT, DOUBLE, SURRENDER, ACTION_NAMES
+from hand import VALUES
+
+
+class HandView:
+    """Read-only view of a player's current hand, the dealer's upcard and the
+       shoe, given to a policy when it decides. Every value is looked up on
+       access, so building a view costs nothing for values a policy ignores.
+
+       While a split hand is played the view shows the pile being played.
+
+    Args:
+        game (Blackjack): the game being played.
+        player_id (int): the ID of the player deciding.
+    """
+    __slots__ = ('_game', '_player_id')
+
+    def __init__(self, game, player_id):
+        self._game = game
+        self._player_id = player_id
+
+    @property
+    def player_id(self):
+        return self._player_id
+
+    @property
+    def _hand(self):
+        return self._game.players[self._player_id].hand
+
+    @property
+    def _hand_value(self):
+        return self._game.pileValue(self._player_id)
+
+    @property
+    def cards(self):
+        """Encoded cards of the hand, or of the pile being played if split."""
+        hand = self._hand
+        if hand.split:
+            return tuple(hand.cards[0 if self._game.current_side == 'left' else 1])
+        return tuple(hand.cards)
+
+    @property
+    def hard(self):
+        return self._hand_value.hard
+
+    @property
+    def soft(self):
+        return self._hand_value.soft
+
+    @property
+    def best(self):
+        return self._hand_value.best
+
+    @property
+    def bust(self):
+        return self._hand_value.bust
+
+    @property
+    def no_cards(self):
+        return self._hand_value.no_cards
+
+    @property
+    def split(self):
+        """Whether the hand has been split."""
+        return self._hand.split
+
+    @property
+    def side(self):
+        """The pile being played, 'left' or 'right', if the hand is split."""
+        return self._game.current_side if self._hand.split else None
+
+    @property
+    def can_split(self):
+        return self._game.canSplit(self._player_id)
+
+    @property
+    def can_double(self):
+        return self._game.canDouble(self._player_id)
+
+    @property
+    def can_surrender(self):
+        return self._game.canSurrender(self._player_id)
+
+    @property
+    def can_insure(self):
+        return self._game.canInsure(self._player_id)
+
+    @property
+    def bet_unit(self):
+        """Smallest bet the table pays in whole chips, see RuleSet.bet_unit."""
+        return self._game.rules.bet_unit
+
+    @property
+    def legal_actions(self):
+        """Names of the actions the rules allow, see Blackjack.legalActions."""
+        return self._game.legalActions(self._player_id)
+
+    @property
+    def pair(self):
+        """Card value of the pair held if the hand can be split, otherwise None."""
+        if self._game.canSplit(self._player_id):
+            return VALUES[self._hand.cards[0]]
+        return None
+
+    @property
+    def bet(self):
+        return self._hand.bet
+
+    @property
+    def bank(self):
+        return self._game.players[self._player_id].bank
+
+    @property
+    def upcard(self):
+        """Value of the dealer's upcard, 1 (Ace) to 10, or None before the deal."""
+        cards = self._game.dealer.hand.cards
+        return VALUES[cards[0]] if cards else None
+
+    @property
+    def running_count(self):
+        return self._game.deck.running_count
+
+    @property
+    def true_count(self):
+        return self._game.deck.true_count
+
+    @property
+    def remaining_decks(self):
+        return self._game.deck.remaining_decks
+
+    def composition(self):
+        """Number of cards remaining in the shoe with each value 1 (Ace) to 10."""
+        return self._game.deck.composition()
+
+
+class Policy:
+    """Decides a player's bets and actions. Attach a policy to a player as
+       Player.policy, or pass it anywhere a decide(game, player_id) function
+       is accepted.
+
+       Subclasses implement decide, and may override bet and decideBatch.
+    """
+
+    def decide(self, view):
+        """Chooses an action for a hand.
+
+        Args:
+            view (HandView): the hand to act on.
+
+        Returns:
+            str: 'hit', 'stand', 'split', 'double', 'surrender' or 'insurance'.
+                 An action the rules don't allow stands.
+        """
+        raise NotImplementedError
+
+    def bet(self, view):
+        """Chooses the bet for the next round, before the cards are dealt.
+
+        Args:
+            view (HandView): the player's empty hand and the shoe.
+
+        Returns:
+            int: the bet to place, a multiple of view.bet_unit. Defaults to
+                 view.bet_unit.
+        """
+        return view.bet_unit
+
+    def decideBatch(self, views):
+        """Chooses an action for each of many hands in one call."""
+        return [self.decide(view) for view in views]
+
+    def __call__(self, game, player_id):
+        return self.decide(HandView(game, player_id))
+
+
+class TablePolicy(Policy):
+    """Plays by lookup in a strategy table.
+
+       A solved strategy's two card action is played where it doubles or
+       surrenders and the rules allow it, otherwise its hit or stand action is.
+       The one card pile left by a split always hits.
+
+    Args:
+        strategy (StrategyTable or numpy array): a solved strategy, see
+                                                 strategy_solver.py, or an
+                                                 action table indexed [soft,
+                                                 best total, upcard] as used by
+                                                 the batch simulator.
+    """
+
+    def __init__(self, strategy):
+        if isinstance(strategy, np.ndarray):
+            self.actions = strategy
+            self.pairs = None
+            self.two_card_actions = None
+        else:
+            self.actions = strategy.actions
+            self.pairs = strategy.pairs
+            self.two_card_actions = strategy.two_card_actions
+
+    def action(self, view):
+        """Action code for a hand, see actions.py."""
+        best = view.best
+        if best > 21:
+            return STAND
+        if view.no_cards == 1:
+            return HIT  # A pile just split draws its second card
+        if self.pairs is not None:
+            pair = view.pair
+            if pair is not None:
+                code = self.pairs[pair, view.upcard]
+                if self._allowed(code, view):
+                    return code
+        soft = int(view.soft)
+        if self.two_card_actions is not None and view.no_cards == 2:
+            code = self.two_card_actions[soft, best, view.upcard]
+            if self._allowed(code, view):
+                return code
+        return self.actions[soft, best, view.upcard]
+
+    @staticmethod
+    def _allowed(code, view):
+        # Doubling and surrendering depend on the hand and the rules
+        if code == DOUBLE:
+            return view.can_double
+        if code == SURRENDER:
+            return view.can_surrender
+        return True
+
+    def decide(self, view):
+        return ACTION_NAMES[self.action(view)]
+
+    def actionCodes(self, soft, best, upcard, pair=None, can_double=False, can_surrender=False,
+                    no_cards=None):
+        """Looks up the actions of many hands at once.
+
+        Args:
+            soft (numpy array of bool): whether each hand is soft.
+            best (numpy array of int): best total of each hand.
+            upcard (numpy array of int): dealer upcard value for each hand.
+            pair (numpy array of int, optional): card value of the pair held by
+                                                 each hand, 0 where it can't split.
+            can_double (numpy array of bool, optional): whether each hand may
+                                                        double. Defaults to False.
+            can_surrender (numpy array of bool, optional): whether each hand may
+                                                           surrender. Defaults
+                                                           to False.
+            no_cards (numpy array of int, optional): number of cards in each
+                                                     hand. A pile of one card,
+                                                     just split, always hits.
+
+        Returns:
+            numpy array of int: action code of each hand.
+        """
+        soft = soft.astype(np.intp)
+        total = np.minimum(best, 21)
+        codes = self.actions[soft, total, upcard]
+        candidates = []
+        if self.two_card_actions is not None:
+            candidates.append((self.two_card_actions[soft, total, upcard], True))
+        if pair is not None and self.pairs is not None:
+            candidates.append((self.pairs[pair, upcard], pair > 0))
+        for candidate, mask in candidates:
+            # A double or surrender only replaces the hit or stand action where allowed
+            allowed = mask & ((candidate != DOUBLE) | can_double) & \
+                ((candidate != SURRENDER) | can_surrender)
+            codes = np.where(allowed, candidate, codes)
+        if no_cards is not None:
+            codes = np.where(no_cards == 1, HIT, codes)
+        return np.where(best > 21, STAND, codes)
+
+    def decideBatch(self, views):
+        soft = np.fromiter((view.soft for view in views), dtype=bool, count=len(views))
+        best = np.fromiter((view.best for view in views), dtype=np.intp, count=len(views))
+        upcard = np.fromiter((view.upcard for view in views), dtype=np.intp, count=len(views))
+        pair = np.fromiter((view.pair or 0 for view in views), dtype=np.intp, count=len(views))
+        no_cards = np.fromiter((view.no_cards for view in views), dtype=np.intp,
+                               count=len(views))
+        can_double = can_surrender = False
+        if self.two_card_actions is not None:
+            can_double = np.fromiter((view.can_double for view in views), dtype=bool,
+                                     count=len(views))
+            can_surrender = np.fromiter((view.can_surrender for view in views), dtype=bool,
+                                        count=len(views))
+        codes = self.actionCodes(soft, best, upcard, pair, can_double, can_surrender, no_cards)
+        return [ACTION_NAMES[code] for code in codes]
+
+
+class CountingPolicy(TablePolicy):
+    """Plays a strategy table, deviating from it and raising its bet as the
+       true count rises.
+
+    Args:
+        strategy (StrategyTable or numpy array): the base strategy, see TablePolicy.
+        min_bet (int, optional): bet at a true count of 1 or below. Defaults to
+                                 the table's bet unit.
+        spread (int, optional): largest bet as a multiple of min_bet. Defaults to 8.
+        deviations (dict, optional): {(soft, best total, upcard) : (true count,
+                                     action)} plays that replace the table's
+                                     action once the true count reaches the
+                                     given count. Defaults to none.
+    """
+
+    def __init__(self, strategy, min_bet=None, spread=8, deviations=None):
+        super().__init__(strategy)
+        self.min_bet = min_bet
+        self.spread = spread
+        self.deviations = deviations or {}
+
+    def bet(self, view):
+        # One more unit for each whole true count above 1
+        units = min(max(int(view.true_count), 1), self.spread)
+        return (self.min_bet or view.bet_unit) * units
+
+    def decide(self, view):
+        if self.deviations and view.best <= 21:
+            deviation = self.deviations.get((view.soft, view.best, view.upcard))
+            if deviation is not None and view.true_count >= deviation[0]:
+                return deviation[1]
+        return super().decide(view)
+
+    def decideBatch(self, views):
+        if self.deviations:
+            return [self.decide(view) for view in views]
+        return super().decideBatch(views)
+
+
+class CallablePolicy(Policy):
+    """Wraps plain functions as a policy.
+
+    Args:
+        decide (callable): called with a HandView, returns 'hit', 'stand' or 'split'.
+        bet (callable, optional): called with a HandView, returns the bet.
+                                  Defaults to betting the table's bet unit.
+    """
+
+    def __init__(self, decide, bet=None):
+        self._decide = decide
+        self._bet = bet
+
+    def decide(self, view):
+        return self._decide(view)
+
+    def bet(self, view):
+        if self._bet is None:
+            return view.bet_unit
+        return self._bet(view)
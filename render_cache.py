@@ -0,0 +1,112 @@
+from collections import OrderedDict
+import pygame
+from hand import CODES
+
+
+class CardTextureCache:
+    """Card images decoded once from disk, with scaled copies converted to the
+       display's pixel format ready to blit.
+
+       Scaled textures are kept per scale factor, with the least recently used
+       scale factor evicted once more than max_scales are held.
+    """
+
+    def __init__(self, path='resources', max_scales=4):
+        self.path = path
+        self.max_scales = max_scales
+        self._images = {}  # {card_code : unscaled image}
+        self._scaled = OrderedDict()  # {scale_factor : [texture per card or None]}
+
+    def image(self, card_code):
+        """The unscaled image of a card, loaded from disk on first use.
+
+        Args:
+            card_code (str): code of the card image, e.g. '2D'.
+
+        Returns:
+            pygame surface: the card image.
+        """
+        image = self._images.get(card_code)
+        if image is None:
+            image = pygame.image.load(f'{self.path}/{card_code}.png')
+            self._images[card_code] = image
+        return image
+
+    def scaleImg(self, image, scale_factor):
+        """Scales an image uniformly by a scale factor.
+
+        Args:
+            image (pygame surface): the image to scale.
+            scale_factor (float): the scale factor to scale the image by.
+
+        Returns:
+            pygame surface: scaled image.
+        """
+        width, height = image.get_size()
+        return pygame.transform.scale(image, (int(width*scale_factor),
+                                              int(height*scale_factor)))
+
+    def _texturesAt(self, scale_factor):
+        textures = self._scaled.get(scale_factor)
+        if textures is None:
+            textures = [None] * len(CODES)
+            self._scaled[scale_factor] = textures
+            if len(self._scaled) > self.max_scales:
+                self._scaled.popitem(last=False)  # Evict least recently used
+        else:
+            self._scaled.move_to_end(scale_factor)
+        return textures
+
+    def get(self, card, scale_factor):
+        """The texture of a card at a scale factor, scaled on first use.
+
+        Args:
+            card (int): the encoded card.
+            scale_factor (float): the scale factor of the displayed card.
+
+        Returns:
+            pygame surface: the scaled card image in the display pixel format.
+        """
+        textures = self._texturesAt(scale_factor)
+        texture = textures[card]
+        if texture is None:
+            texture = self.scaleImg(self.image(CODES[card]), scale_factor).convert_alpha()
+            textures[card] = texture
+        return texture
+
+    def preload(self, scale_factor):
+        """Loads and scales every card at a scale factor ahead of time."""
+        for card in range(len(CODES)):
+            self.get(card, scale_factor)
+
+
+class TextCache:
+    """Rendered text surfaces kept by (font, text, colour), so labels that
+       don't change between frames are only rendered once. The least recently
+       used surface is evicted once more than max_size are held."""
+
+    def __init__(self, max_size=256):
+        self.max_size = max_size
+        self._surfaces = OrderedDict()  # {(font, text, colour) : surface}
+
+    def render(self, font, text, colour):
+        """Renders antialiased text, reusing a previous render when possible.
+
+        Args:
+            font (pygame Font): the font to render with.
+            text (str): the text to render.
+            colour (tuple (int,int,int)): the text colour.
+
+        Returns:
+            pygame surface: the rendered text.
+        """
+        key = (font, text, colour)
+        surface = self._surfaces.get(key)
+        if surface is None:
+            surface = font.render(text, 1, colour)
+            self._surfaces[key] = surface
+            if len(self._surfaces) > self.max_size:
+                self._surfaces.popitem(last=False)  # Evict least recently used
+        else:
+            self._surfaces.move_to_end(key)
+        return surface
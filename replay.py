@@ -0,0 +1,166 @@
+import argparse
+import base64
+import json
+import time
+from headless_blackjack import HeadlessBlackjack
+from snapshot import snapshot, restore
+
+REPLAY_VERSION = 1
+
+# Player decisions are logged as one letter each
+ACTION_CODES = {'hit': 'H', 'stand': 'S', 'split': 'P', 'double': 'D', 'surrender': 'R',
+                'insurance': 'I'}
+CODE_ACTIONS = {code: action for action, code in ACTION_CODES.items()}
+
+
+class SessionRecorder:
+    """Records a session as the game's starting state and each player's bet
+       and decisions every round, which is all that is needed to replay it.
+
+       The recorder is a hand history sink, so recording starts once it is
+       attached to a game between rounds.
+
+    Args:
+        game (Blackjack): the game to record. Its shoe must shuffle with a
+                          PCG64 generator (numpy's default).
+        seed (int, optional): the seed the game was created with, kept for
+                              reference. The starting state is what replays.
+    """
+
+    def __init__(self, game, seed=None):
+        self.seed = seed
+        self.start = snapshot(game)
+        self.start_round = game.round_count
+        self.no_players = game.no_players
+        self.rounds = []  # [[[bet, decision codes] per player] per round]
+        game.event_sinks.append(self)
+
+    def _round(self, round_no):
+        index = round_no - self.start_round
+        while len(self.rounds) <= index:
+            self.rounds.append([[0, ''] for _ in range(self.no_players)])
+        return self.rounds[index]
+
+    def write(self, event):
+        if event.kind == 'deal':
+            self._round(event.round_no)  # A round is logged even if nobody acts
+        elif event.kind == 'bet':
+            self._round(event.round_no)[event.seat][0] += event.amount
+        elif event.kind in ACTION_CODES:
+            self._round(event.round_no)[event.seat][1] += ACTION_CODES[event.kind]
+
+    def close(self):
+        pass
+
+    def asDict(self):
+        return {'version': REPLAY_VERSION, 'seed': self.seed,
+                'start': base64.b64encode(self.start).decode(),
+                'start_round': self.start_round, 'rounds': self.rounds}
+
+    def save(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.asDict(), f, separators=(',', ':'))
+
+
+def loadLog(path):
+    """Reads a session log saved by SessionRecorder.save."""
+    with open(path) as f:
+        log = json.load(f)
+    if log['version'] != REPLAY_VERSION:
+        raise ValueError(f"Unsupported replay version {log['version']}, "
+                         f'expected {REPLAY_VERSION}.')
+    return log
+
+
+class Replayer:
+    """Re-executes a recorded session headlessly at full speed.
+
+       Snapshots are kept as keyframes every keyframe_interval rounds as the
+       replay passes them, so seeking back to an earlier round only replays
+       the rounds since the nearest keyframe.
+
+    Args:
+        log (dict): a session log, see SessionRecorder.asDict and loadLog.
+        keyframe_interval (int, optional): rounds between keyframes.
+                                           Defaults to 1000.
+    """
+
+    def __init__(self, log, keyframe_interval=1000):
+        self.start = base64.b64decode(log['start'])
+        self.start_round = log['start_round']
+        self.rounds = log['rounds']
+        self.keyframe_interval = keyframe_interval
+        self.keyframes = {0: self.start}  # {rounds into the replay : snapshot}
+        self.game = restore(self.start, HeadlessBlackjack())
+        self._decisions = None
+
+    def __len__(self):
+        return len(self.rounds)
+
+    @property
+    def position(self):
+        """Number of recorded rounds replayed so far."""
+        return self.game.round_count - self.start_round
+
+    def _decide(self, game, player_id):
+        decisions = self._decisions[player_id]
+        if not decisions:
+            return 'stand'
+        action = CODE_ACTIONS[decisions[0]]
+        self._decisions[player_id] = decisions[1:]
+        return action
+
+    def playRound(self):
+        """Replays the next recorded round.
+
+        Returns:
+            RoundResult: the result of the round, see HeadlessBlackjack.
+        """
+        position = self.position
+        if position % self.keyframe_interval == 0 and position not in self.keyframes:
+            self.keyframes[position] = snapshot(self.game)
+        bets, self._decisions = zip(*self.rounds[position])
+        self._decisions = list(self._decisions)
+        return self.game.playRound(list(bets), self._decide)
+
+    def seek(self, position):
+        """Moves the replay to just before a recorded round, without replaying
+           more than keyframe_interval rounds when returning to one already
+           passed.
+
+        Args:
+            position (int): rounds into the replay, from 0 to len(self).
+        """
+        if not 0 <= position <= len(self):
+            raise ValueError(f'Replay has {len(self)} rounds, cannot seek to {position}.')
+        keyframe = max(k for k in self.keyframes if k <= position)
+        if position < self.position or keyframe > self.position:
+            restore(self.keyframes[keyframe], self.game)
+        while self.position < position:
+            self.playRound()
+
+    def run(self):
+        """Replays every remaining round.
+
+        Returns:
+            list of RoundResult: the result of each round replayed.
+        """
+        return [self.playRound() for _ in range(len(self) - self.position)]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Replay a recorded Blackjack session.')
+    parser.add_argument('log')
+    parser.add_argument('--round', type=int, default=None, help='show this round only')
+    args = parser.parse_args()
+
+    replayer = Replayer(loadLog(args.log))
+    if args.round is not None:
+        replayer.seek(args.round)
+        print(replayer.playRound())
+    else:
+        start = time.perf_counter()
+        results = replayer.run()
+        elapsed = time.perf_counter() - start
+        print(f'Replayed {len(results)} rounds in {elapsed:.2f}s')
+        print('Final banks:', [player.bank for player in replayer.game.players])
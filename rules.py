@@ -0,0 +1,142 @@
+import math
+import numpy as np
+from settlement import BLACKJACK_PAYOUT
+
+# Version of the rules code. Bump it whenever a change alters what a rule set
+# compiles to or how hands are played or settled, so tables solved under an
+# older version are rebuilt rather than reused.
+RULES_VERSION = 1
+
+# Rule tables are indexed by best total, which never exceeds 30
+TOTALS = 32
+
+# Two card hands allowed to double: any, hard 9 to 11, hard 10 or 11, or none
+DOUBLE_RULES = ('any', '9-11', '10-11', 'none')
+_DOUBLE_TOTALS = {'any': range(4, 21), '9-11': range(9, 12), '10-11': range(10, 12),
+                  'none': range(0)}
+
+
+class RuleSet:
+    """The rules a table is played by, compiled once into lookup tables that
+       the engines index directly, so a rule variant costs no branching while
+       hands are played.
+
+       Each table is held as a NumPy array for the batch simulator, with a
+       tuple copy for fast lookup of a single hand, like the card lookups in
+       hand.py. A seat holds at most two piles, so a pair may only be split
+       once.
+
+       Chips are whole numbers, so every bet must be a multiple of bet_unit,
+       the smallest bet whose every payout is a whole number of chips: 2 at
+       3:2, where a natural on 2 wins 3.
+
+    Args:
+        hits_soft_17 (bool, optional): the dealer draws to a soft 17 (H17).
+                                       Defaults to False, the dealer stands on
+                                       every 17 (S17).
+        double (str, optional): the two card hands that may double, one of
+                                DOUBLE_RULES. Defaults to 'any'.
+        double_after_split (bool, optional): the piles of a split hand may
+                                             double on their first two cards.
+                                             Defaults to True.
+        surrender (bool, optional): a hand may be given up on its first two
+                                    cards for half its bet. Defaults to False.
+        insurance (bool, optional): insurance against a dealer blackjack is
+                                    offered when the upcard is an Ace, for half
+                                    the bet and paying 2:1. Defaults to False.
+        split (bool, optional): a pair of equal value cards may be split.
+                                Defaults to True.
+        blackjack_payout (tuple (int, int), optional): a natural wins
+                                                       bet * numerator / denominator.
+                                                       Defaults to 3:2.
+    """
+
+    def __init__(self, hits_soft_17=False, double='any', double_after_split=True,
+                 surrender=False, insurance=False, split=True,
+                 blackjack_payout=BLACKJACK_PAYOUT):
+        if double not in DOUBLE_RULES:
+            raise ValueError(f'Unknown doubling rule {double!r}, expected one of {DOUBLE_RULES}.')
+        numerator, denominator = blackjack_payout
+        if numerator < 0 or denominator < 1:
+            raise ValueError(f'Invalid blackjack payout {numerator}:{denominator}.')
+
+        self.hits_soft_17 = bool(hits_soft_17)
+        self.double = double
+        self.double_after_split = bool(double_after_split)
+        self.surrender = bool(surrender)
+        self.insurance = bool(insurance)
+        self.split = bool(split)
+        self.blackjack_payout = (int(numerator), int(denominator))
+        # A natural wins bet * numerator / denominator, and a surrender or an
+        # insurance bet is half the bet
+        self.bet_unit = denominator // math.gcd(numerator, denominator)
+        if self.surrender or self.insurance:
+            self.bet_unit = math.lcm(self.bet_unit, 2)
+        self._compile()
+
+    def _compile(self):
+        totals = np.arange(TOTALS)
+
+        # Whether the dealer draws, indexed [soft, best total]
+        draws = totals < 17
+        self.dealer_draw_table = np.stack([draws, draws | (self.hits_soft_17 & (totals == 17))])
+
+        # Whether a two card pile may double, indexed [split, soft, best total]
+        double = np.zeros((2, 2, TOTALS), dtype=bool)
+        double[:, 0, _DOUBLE_TOTALS[self.double]] = True
+        if self.double == 'any':
+            double[:, 1, 12:21] = True
+        if not self.double_after_split:
+            double[1] = False
+        self.double_table = double
+
+        # Whether a pair may split, indexed by card value 1 (Ace) to 10
+        self.split_table = np.zeros(11, dtype=bool)
+        self.split_table[1:] = self.split
+
+        # Whether insurance is offered, indexed by upcard value
+        self.insurance_table = np.zeros(11, dtype=bool)
+        self.insurance_table[1] = self.insurance
+
+        # Tuple copies of the tables for fast access with a single hand
+        self.dealer_draws = tuple(map(tuple, self.dealer_draw_table.tolist()))
+        self.can_double = tuple(tuple(map(tuple, table)) for table in double.tolist())
+        self.can_split = tuple(self.split_table.tolist())
+        self.offers_insurance = tuple(self.insurance_table.tolist())
+
+    def payable(self, bet):
+        """Whether every payout on a bet is a whole number of chips."""
+        return bet % self.bet_unit == 0
+
+    @property
+    def key(self):
+        """Every rule as a tuple, identifying the rule set."""
+        return (self.hits_soft_17, self.double, self.double_after_split, self.surrender,
+                self.insurance, self.split, self.blackjack_payout)
+
+    def asDict(self):
+        """Every rule by name, in a form that serialises to JSON."""
+        return {'hits_soft_17': self.hits_soft_17, 'double': self.double,
+                'double_after_split': self.double_after_split, 'surrender': self.surrender,
+                'insurance': self.insurance, 'split': self.split,
+                'blackjack_payout': list(self.blackjack_payout)}
+
+    @classmethod
+    def fromDict(cls, rules):
+        """Rebuilds a rule set from RuleSet.asDict, e.g. after a JSON round trip."""
+        rules = dict(rules)
+        rules['blackjack_payout'] = tuple(rules['blackjack_payout'])
+        return cls(**rules)
+
+    def __eq__(self, other):
+        return isinstance(other, RuleSet) and self.key == other.key
+
+    def __hash__(self):
+        return hash(self.key)
+
+    def __repr__(self):
+        rules = ', '.join(f'{name}={value!r}' for name, value in zip(self.asDict(), self.key))
+        return f'RuleSet({rules})'
+
+
+DEFAULT_RULES = RuleSet()
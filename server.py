@@ -0,0 +1,293 @@
+import argparse
+import asyncio
+from itertools import count
+import numpy as np
+from cli_blackjack import Blackjack
+from hand import CODES
+
+
+# Line protocol, one command or message per line.
+#   Client -> server: JOIN [table], BET <amount>, HIT, STAND, QUIT
+#   Server -> client: WELCOME <table> <seat> <bank>, BETS, OK BET <amount> <bank>,
+#                     DEAL <cards...> <value>, DEALER <cards...> <value>,
+#                     TURN <value>, CARD <card> <value>, BUST, OK STAND,
+#                     RESULT <win|draw|lose> <bank>, ERROR <reason>
+
+
+def handString(hand_value, cards):
+    return ' '.join(CODES[card] for card in cards) + f' {hand_value.best}'
+
+
+class Session:
+    """A connected player, seated at one table."""
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.commands = asyncio.Queue()  # Commands waiting for the table
+        self.table = None
+        self.seat = None
+        self.closed = False
+
+    def send(self, line):
+        if not self.closed:
+            self.writer.write(line.encode() + b'\n')
+
+    async def nextCommand(self, expected, timeout):
+        """Waits for the next of the expected commands from the player.
+
+        Args:
+            expected (tuple of str): commands accepted at this point.
+            timeout (float): seconds to wait before giving up.
+
+        Returns:
+            list of str or None: the command and its arguments, or None if the
+                                 player timed out or left.
+        """
+        while True:
+            try:
+                command = await asyncio.wait_for(self.commands.get(), timeout)
+            except asyncio.TimeoutError:
+                return None
+            if command[0] == 'QUIT':
+                return None
+            if command[0] in expected:
+                return command
+            self.send(f'ERROR unexpected {command[0]}')
+
+
+class TableSession:
+    """One table of the server, running rounds on its own Blackjack rules
+       engine with its own shoe, for the players seated at it."""
+
+    def __init__(self, name, seats, player_bank, dealer_delay, action_timeout, rng):
+        self.name = name
+        self.game = Blackjack(no_players=seats, player_bank=player_bank, verbose=False,
+                              rng=rng)
+        self.player_bank = player_bank
+        self.dealer_delay = dealer_delay
+        self.action_timeout = action_timeout
+        self.sessions = {}  # {seat : session}
+        self.task = None
+
+    def hasSeat(self):
+        return len(self.sessions) < len(self.game.players)
+
+    def seatPlayer(self, session):
+        seat = min(set(range(len(self.game.players))) - set(self.sessions))
+        self.sessions[seat] = session
+        # A new player takes the seat with a fresh bank
+        self.game.players[seat].bank = self.player_bank
+        session.table = self
+        session.seat = seat
+        session.send(f'WELCOME {self.name} {seat} {self.player_bank}')
+
+    def broadcast(self, line):
+        for session in self.sessions.values():
+            session.send(line)
+
+    async def collectBets(self):
+        """Asks every seated player for a bet.
+
+        Returns:
+            list of int: the seats playing this round.
+        """
+        sessions = dict(self.sessions)
+        for session in sessions.values():
+            session.send('BETS')
+        commands = await asyncio.gather(*(session.nextCommand(('BET',), self.action_timeout)
+                                          for session in sessions.values()))
+        playing = []
+        for (seat, session), command in zip(sessions.items(), commands):
+            if command is None:
+                continue
+            try:
+                bet = int(command[1])
+            except (IndexError, ValueError):
+                session.send('ERROR invalid bet')
+                continue
+            if not self.game.rules.payable(bet):
+                # Every payout must be a whole number of chips
+                session.send('ERROR invalid bet')
+                continue
+            if bet > 0 and self.game.placeBet(bet, player_id=seat):
+                session.send(f'OK BET {bet} {self.game.players[seat].bank}')
+                playing.append(seat)
+            else:
+                session.send('ERROR insufficient funds')
+        return playing
+
+    async def playTurn(self, seat):
+        """Lets a player hit until they stand, bust, time out or leave."""
+        session = self.sessions[seat]
+        player = self.game.players[seat]
+        while True:
+            session.send(f'TURN {player.hand.hand_value.best}')
+            command = await session.nextCommand(('HIT', 'STAND'), self.action_timeout)
+            if command is None or command[0] == 'STAND':
+                self.game.playerStands(player_id=seat)
+                session.send('OK STAND')
+                return
+            self.game.personDraws(player_id=seat)
+            card = player.hand.cards[-1]
+            session.send(f'CARD {CODES[card]} {player.hand.hand_value.best}')
+            if self.game.calcBust(player_id=seat):
+                session.send('BUST')
+                return
+
+    async def playRound(self):
+        """Plays one round for every seated player who bets."""
+        game = self.game
+        playing = await self.collectBets()
+        if not playing:
+            return
+        # Only seats with a bet take part in the round
+        game.table.active_seats = set(playing)
+
+        # Dealer init
+        game.personDraws(dealer=True)
+        self.broadcast('DEALER ' + handString(game.dealer.hand.hand_value, game.dealer.hand.cards))
+        # Players init
+        for seat in playing:
+            game.personDraws(player_id=seat, times=2)
+            hand = game.players[seat].hand
+            self.sessions[seat].send('DEAL ' + handString(hand.hand_value, hand.cards))
+
+        for seat in playing:
+            if seat in self.sessions:
+                await self.playTurn(seat)
+
+        if game.allBust():
+            results = game.forfeitBets()
+            outcomes = {seat: results[seat] for seat in playing}
+        else:
+            # Dealer draws, paced so players can follow
+            while game.dealerContinueDraw():
+                await asyncio.sleep(self.dealer_delay)
+                game.personDraws(dealer=True)
+                self.broadcast('DEALER ' + handString(game.dealer.hand.hand_value,
+                                                      game.dealer.hand.cards))
+            game.calcBust(dealer=True)
+            results = game.checkWinners()
+            outcomes = {seat: results[seat] for seat in playing}
+
+        for seat, outcome in outcomes.items():
+            if seat in self.sessions:
+                self.sessions[seat].send(f'RESULT {outcome} {game.players[seat].bank}')
+        game.reset()
+
+    async def run(self):
+        """Plays rounds while any player is seated."""
+        while self.sessions:
+            await self.playRound()
+            # Free the seats of players who have left
+            for seat, session in list(self.sessions.items()):
+                if session.closed:
+                    del self.sessions[seat]
+            await asyncio.sleep(0)
+
+
+class BlackjackServer:
+    """Hosts many independent Blackjack tables in one process, serving
+       players over a line-delimited protocol on TCP or Unix sockets.
+
+    Args:
+        seats (int, optional): player seats per table. Defaults to 7.
+        player_bank (int, optional): starting bank of each player. Defaults to 1000.
+        dealer_delay (float, optional): seconds between dealer draws. Defaults to 1.
+        action_timeout (float, optional): seconds a player has to bet or act
+                                          before they sit out or stand.
+                                          Defaults to 30.
+        seed (int, optional): master seed for every table's shoe.
+    """
+
+    def __init__(self, seats=7, player_bank=1000, dealer_delay=1.0, action_timeout=30.0,
+                 seed=None):
+        self.seats = seats
+        self.player_bank = player_bank
+        self.dealer_delay = dealer_delay
+        self.action_timeout = action_timeout
+        self.seed_sequence = np.random.SeedSequence(seed)
+        self.tables = {}  # {name : TableSession}
+        self.table_ids = count()
+
+    def findTable(self, name=None):
+        """The named table, or any table with a free seat, creating it if needed."""
+        if name is None:
+            for table in self.tables.values():
+                if table.hasSeat():
+                    return table
+            name = f'table{next(self.table_ids)}'
+        table = self.tables.get(name)
+        if table is None:
+            rng = np.random.default_rng(self.seed_sequence.spawn(1)[0])
+            table = TableSession(name, self.seats, self.player_bank, self.dealer_delay,
+                                 self.action_timeout, rng)
+            self.tables[name] = table
+        return table
+
+    async def handleConnection(self, reader, writer):
+        session = Session(reader, writer)
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                command = line.decode().split()
+                if not command:
+                    continue
+                command[0] = command[0].upper()
+
+                if session.table is None:
+                    # Seat the player on their first command
+                    table = self.findTable(command[1] if command[0] == 'JOIN' and
+                                           len(command) > 1 else None)
+                    if not table.hasSeat():
+                        session.send('ERROR table full')
+                        continue
+                    table.seatPlayer(session)
+                    if table.task is None or table.task.done():
+                        table.task = asyncio.create_task(table.run())
+                    if command[0] == 'JOIN':
+                        continue
+                if command[0] == 'QUIT':
+                    break
+                session.commands.put_nowait(command)
+        except ConnectionError:
+            pass
+        finally:
+            session.closed = True
+            session.commands.put_nowait(['QUIT'])
+            writer.close()
+
+    async def serve(self, host='127.0.0.1', port=8765, path=None):
+        """Accepts players until cancelled.
+
+        Args:
+            host (str, optional): TCP address to listen on. Defaults to 127.0.0.1.
+            port (int, optional): TCP port to listen on. Defaults to 8765.
+            path (str, optional): listen on this Unix socket instead of TCP.
+        """
+        if path is not None:
+            server = await asyncio.start_unix_server(self.handleConnection, path)
+        else:
+            server = await asyncio.start_server(self.handleConnection, host, port)
+        async with server:
+            await server.serve_forever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Multi-table Blackjack server.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--unix', default=None, help='Unix socket path to listen on')
+    parser.add_argument('--seats', type=int, default=7)
+    parser.add_argument('--dealer-delay', type=float, default=1.0)
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    server = BlackjackServer(args.seats, dealer_delay=args.dealer_delay, seed=args.seed)
+    try:
+        asyncio.run(server.serve(args.host, args.port, args.unix))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,135 @@
+import numpy as np
+
+
+# Outcome of each settled hand
+LOSE = 0
+DRAW = 1
+WIN = 2
+NATURAL = 3  # Won with a blackjack
+SURRENDERED = 4  # Given up for half the bet back
+OUTCOME_NAMES = ('lose', 'draw', 'win', 'win', 'lose')
+
+BLACKJACK_PAYOUT = (3, 2)  # A natural wins 3 for every 2 bet
+INSURANCE_PAYOUT = 2  # Insurance wins 2 for every 1 bet
+
+
+def _ruling(surrendered, bust, natural, dealer_natural, dealer_bust, compare):
+    """The outcome of one hand. compare is the sign of the player's total
+       minus the dealer's."""
+    if surrendered:
+        return SURRENDERED
+    if bust:
+        return LOSE
+    if natural:
+        return DRAW if dealer_natural else NATURAL
+    # With no dealer hole card, a dealer natural beats every other hand
+    if dealer_natural:
+        return LOSE
+    if dealer_bust or compare > 0:
+        return WIN
+    return DRAW if compare == 0 else LOSE
+
+
+# Every settlement rule as one lookup table, indexed by [surrendered, bust,
+# natural, dealer natural, dealer bust, compare + 1], so settling one hand or
+# a million applies exactly the same rules
+RULINGS = np.array([[[[[[_ruling(s, b, n, dn, db, c - 1) for c in range(3)]
+                        for db in range(2)] for dn in range(2)] for n in range(2)]
+                     for b in range(2)] for s in range(2)], dtype=np.uint8)
+_RULINGS = RULINGS.ravel().tolist()
+
+
+def payoutRatios(blackjack_payout=BLACKJACK_PAYOUT):
+    """Amount returned per unit bet for each outcome, stake included, as
+       (numerators, denominators). A natural returns bet * 5 / 2 at 3:2, the
+       stake plus the 3:2 win, and a surrender returns half the bet."""
+    numerator, denominator = blackjack_payout
+    return (0, 1, 2, numerator + denominator, 1), (1, 1, 1, denominator, 2)
+
+
+def settleHand(total, bust, natural, bet, dealer_total, dealer_bust, dealer_natural,
+               blackjack_payout=BLACKJACK_PAYOUT, surrendered=False):
+    """Settles a single hand against the dealer. See settle for the rules.
+
+    Returns:
+        tuple (int, int): the amount returned to the player, stake included,
+                          and the hand's outcome code.
+
+    Raises:
+        ValueError: if the payout is not a whole number of chips, see
+                    RuleSet.bet_unit.
+    """
+    compare = (total > dealer_total) - (total < dealer_total)
+    outcome = _RULINGS[((((surrendered * 2 + bust) * 2 + natural) * 2 + dealer_natural) * 2
+                        + dealer_bust) * 3 + compare + 1]
+    if outcome == NATURAL:
+        numerator, denominator = blackjack_payout
+        payout, remainder = divmod(bet * (numerator + denominator), denominator)
+    elif outcome == SURRENDERED:
+        payout, remainder = divmod(bet, 2)
+    else:
+        return bet * outcome, outcome  # Nothing, the stake or twice the stake back
+    if remainder:
+        raise ValueError(f'A bet of {bet} cannot be paid in whole chips.')
+    return payout, outcome
+
+
+def settle(totals, bust, natural, bets, dealer_total, dealer_bust, dealer_natural,
+           blackjack_payout=BLACKJACK_PAYOUT, surrendered=False):
+    """Settles many hands against the dealer in one vectorised pass.
+
+       A surrendered hand returns half its bet, whatever the dealer holds. A
+       bust hand always loses. A natural pushes against a dealer natural and
+       otherwise wins at the blackjack payout. With no dealer hole card, a
+       dealer natural beats every other hand, including both piles of a split.
+       Otherwise a dealer bust or a higher total wins at even money and an
+       equal total pushes.
+
+    Args:
+        totals (array of int): best total of each hand.
+        bust (array of bool): whether each hand has bust.
+        natural (array of bool): whether each hand is a natural. Split piles
+                                 are never naturals.
+        bets (array of int): the bet on each hand.
+        dealer_total (int or array of int): the dealer's best total, per hand
+                                            when settling many tables at once.
+        dealer_bust (bool or array of bool): whether the dealer has bust.
+        dealer_natural (bool or array of bool): whether the dealer has a natural.
+        blackjack_payout (tuple (int, int), optional): a natural wins
+                                                       bet * numerator / denominator.
+                                                       Defaults to 3:2.
+        surrendered (bool or array of bool, optional): whether each hand was
+                                                       surrendered. Defaults to
+                                                       False.
+
+    Returns:
+        tuple (numpy array of int64, numpy array of uint8): the amount returned
+            to each player from their hand, stake included, and each hand's
+            outcome code.
+
+    Raises:
+        ValueError: if any payout is not a whole number of chips, see
+                    RuleSet.bet_unit.
+    """
+    totals = np.asarray(totals, dtype=np.int64)
+    bets = np.asarray(bets, dtype=np.int64)
+    outcomes = RULINGS[np.asarray(surrendered, dtype=np.intp),
+                       np.asarray(bust, dtype=np.intp), np.asarray(natural, dtype=np.intp),
+                       np.asarray(dealer_natural, dtype=np.intp),
+                       np.asarray(dealer_bust, dtype=np.intp),
+                       np.sign(totals - dealer_total) + 1]
+    numerators, denominators = (np.array(ratios, dtype=np.int64)
+                                for ratios in payoutRatios(blackjack_payout))
+    payouts, remainders = np.divmod(bets * numerators[outcomes], denominators[outcomes])
+    if remainders.any():
+        raise ValueError(f'Bets of {sorted(set(bets[remainders != 0].tolist()))} cannot be '
+                         'paid in whole chips.')
+    return payouts, outcomes
+
+
+def settleInsurance(insurance, dealer_natural):
+    """Amount returned from insurance bets, stake included. Insurance wins
+       at 2:1 when the dealer makes a natural and is lost otherwise. Takes
+       single bets or arrays."""
+    return insurance * (1 + INSURANCE_PAYOUT) * dealer_natural
+
@@ -0,0 +1,236 @@
+import struct
+import numpy as np
+from cli_blackjack import Blackjack
+from hand import Shoe, COUNTING_SYSTEMS
+from rules import RuleSet, DOUBLE_RULES
+from table import Table
+
+# Binary snapshot of a game, little endian:
+#   header   magic, format version, decks, penetration, players, current side,
+#            rounds played
+#   rules    the table's rule set, see rules.py: hits soft 17, doubling rule,
+#            double after split, surrender, insurance, split and the blackjack
+#            payout numerator and denominator
+#   rng      PCG64 state (128 bit state and increment as uint64 pairs) and the
+#            buffered 32 bit output
+#   shoe     counting system, shoe length, cursor position, cut card, then every
+#            card as one byte
+#   people   dealer then each player: player ID and bank, bet, split flag, hand
+#            flags (left or only pile doubled, right pile doubled, surrendered),
+#            insurance bet, then each pile of cards as a count followed by one
+#            byte per card
+# Money is stored as int64. Hand values and bust flags are rebuilt from the cards.
+# Version 1 snapshots, which have no rules or hand flags, restore with the
+# default rules.
+MAGIC = b'BJSS'
+SNAPSHOT_VERSION = 2
+
+_HEADER = struct.Struct('<4sHBdHBQ')
+_RULES = struct.Struct('<8B')
+_RNG = struct.Struct('<QQQQBI')
+_SHOE = struct.Struct('<III')
+_PERSON = struct.Struct('<qqqBBq')
+_PERSON_V1 = struct.Struct('<qqqB')
+_PILE = struct.Struct('<B')
+
+_LEFT_DOUBLED, _RIGHT_DOUBLED, _SURRENDERED = 1, 2, 4
+
+_SIDES = (None, 'left', 'right')
+_SYSTEMS = tuple(COUNTING_SYSTEMS)  # Counting systems stored by index
+_CUSTOM_SYSTEM = 255  # Followed by 11 signed tags
+_TAGS = struct.Struct('<11b')
+_MASK64 = (1 << 64) - 1
+
+
+def _packRNG(rng):
+    state = rng.bit_generator.state
+    if state['bit_generator'] != 'PCG64':
+        raise ValueError(f"Only PCG64 generators can be snapshot, not {state['bit_generator']}.")
+    inner = state['state']
+    return _RNG.pack(inner['state'] >> 64, inner['state'] & _MASK64,
+                     inner['inc'] >> 64, inner['inc'] & _MASK64,
+                     state['has_uint32'], state['uinteger'])
+
+
+def _unpackRNG(data, offset):
+    state_high, state_low, inc_high, inc_low, has_uint32, uinteger = \
+        _RNG.unpack_from(data, offset)
+    rng = np.random.Generator(np.random.PCG64())
+    rng.bit_generator.state = {'bit_generator': 'PCG64',
+                               'state': {'state': state_high << 64 | state_low,
+                                         'inc': inc_high << 64 | inc_low},
+                               'has_uint32': has_uint32, 'uinteger': uinteger}
+    return rng, offset + _RNG.size
+
+
+def _packRules(rules):
+    return _RULES.pack(rules.hits_soft_17, DOUBLE_RULES.index(rules.double),
+                       rules.double_after_split, rules.surrender, rules.insurance,
+                       rules.split, *rules.blackjack_payout)
+
+
+def _unpackRules(data, offset):
+    hits_soft_17, double, double_after_split, surrender, insurance, split, numerator, \
+        denominator = _RULES.unpack_from(data, offset)
+    rules = RuleSet(hits_soft_17, DOUBLE_RULES[double], double_after_split, surrender,
+                    insurance, split, (numerator, denominator))
+    return rules, offset + _RULES.size
+
+
+def _packPerson(person, player_id=-1, bank=0):
+    hand = person.hand
+    piles = hand.cards if hand.split else [hand.cards]
+    doubled = hand.doubled if hand.split else (hand.doubled, False)
+    flags = _LEFT_DOUBLED * doubled[0] | _RIGHT_DOUBLED * doubled[1] | \
+        _SURRENDERED * hand.surrendered
+    parts = [_PERSON.pack(player_id, bank, hand.bet, hand.split, flags, hand.insurance)]
+    for pile in piles:
+        parts.append(_PILE.pack(len(pile)))
+        parts.append(bytes(pile))
+    return b''.join(parts)
+
+
+def _unpackPerson(person, data, offset, version=SNAPSHOT_VERSION):
+    if version == 1:
+        player_id, bank, bet, split = _PERSON_V1.unpack_from(data, offset)
+        flags = insurance = 0
+        offset += _PERSON_V1.size
+    else:
+        player_id, bank, bet, split, flags, insurance = _PERSON.unpack_from(data, offset)
+        offset += _PERSON.size
+    piles = []
+    for _ in range(2 if split else 1):
+        length, = _PILE.unpack_from(data, offset)
+        offset += _PILE.size
+        piles.append(list(data[offset:offset + length]))
+        offset += length
+
+    hand = person.hand
+    hand.bet = bet
+    hand.split = bool(split)
+    hand.cards = piles if split else piles[0]
+    hand.calcHandValue()
+    hand.surrendered = bool(flags & _SURRENDERED)
+    hand.insurance = insurance
+    if split:
+        hand.bust = (hand.hand_value[0].bust, hand.hand_value[1].bust)
+        hand.doubled = (bool(flags & _LEFT_DOUBLED), bool(flags & _RIGHT_DOUBLED))
+    else:
+        hand.bust = hand.hand_value.bust
+        hand.doubled = bool(flags & _LEFT_DOUBLED)
+    return player_id, bank, offset
+
+
+def snapshot(game):
+    """Serialises the full state of a game, including its random number
+       generator, so it can be resumed exactly.
+
+    Args:
+        game (Blackjack): the game to snapshot. Its shoe must shuffle with a
+                          PCG64 generator (numpy's default).
+
+    Returns:
+        bytes: the snapshot.
+    """
+    deck = game.deck
+    system = deck.counting_system
+    if type(system) is str:
+        system_bytes = bytes((_SYSTEMS.index(system),))
+    else:
+        system_bytes = bytes((_CUSTOM_SYSTEM,)) + _TAGS.pack(*system)
+
+    parts = [_HEADER.pack(MAGIC, SNAPSHOT_VERSION, deck.no_decks, deck.penetration,
+                          game.no_players, _SIDES.index(game.current_side),
+                          game.round_count),
+             _packRules(game.rules),
+             _packRNG(deck.rng),
+             system_bytes,
+             _SHOE.pack(len(deck._cards), deck._position, deck.cut_card),
+             deck._cards,
+             _packPerson(game.dealer)]
+    for player in game.players:
+        parts.append(_packPerson(player, player.id, player.bank))
+    return b''.join(parts)
+
+
+def restore(data, game=None):
+    """Rebuilds a game from a snapshot, resuming its shoe and random number
+       generator exactly where they were.
+
+    Args:
+        data (bytes): a snapshot made by snapshot().
+        game (Blackjack, optional): game to restore into, e.g. a HeadlessBlackjack,
+                                    whose shoe, table and rules are replaced.
+                                    Policies are not part of a snapshot, so
+                                    each seat keeps the policy attached to it.
+                                    Defaults to a new quiet Blackjack.
+
+    Returns:
+        Blackjack: the restored game.
+    """
+    magic, version, no_decks, penetration, no_players, side, round_count = \
+        _HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError('Not a Blackjack snapshot.')
+    if version not in (1, SNAPSHOT_VERSION):
+        raise ValueError(f'Unsupported snapshot version {version}, '
+                         f'expected {SNAPSHOT_VERSION}.')
+    offset = _HEADER.size
+    if version == 1:
+        rules = RuleSet()
+    else:
+        rules, offset = _unpackRules(data, offset)
+    rng, offset = _unpackRNG(data, offset)
+
+    system = data[offset]
+    offset += 1
+    if system == _CUSTOM_SYSTEM:
+        counting_system = _TAGS.unpack_from(data, offset)
+        offset += _TAGS.size
+    else:
+        counting_system = _SYSTEMS[system]
+
+    length, position, cut_card = _SHOE.unpack_from(data, offset)
+    offset += _SHOE.size
+
+    # Building a shoe shuffles it, so it is given a throwaway generator
+    if game is None:
+        game = Blackjack(no_players, verbose=False, rng=np.random.default_rng(0))
+    policies = [player.policy for player in game.players]
+    deck = game.deck = Shoe(no_decks, penetration, rng=np.random.default_rng(0))
+    deck.rng = rng
+    game.no_players = no_players
+    game.table = Table(no_players)
+    game.dealer = game.table.dealer
+    game.players = game.table.seats
+    game.round_count = round_count
+    game.rules = rules
+    deck._cards = bytes(data[offset:offset + length])
+    offset += length
+    deck._position = position
+    deck.cut_card = cut_card
+    deck.setCountingSystem(counting_system)  # Recounts the cards dealt
+    game.current_side = _SIDES[side]
+
+    _, _, offset = _unpackPerson(game.dealer, data, offset, version)
+    for seat, player in enumerate(game.players):
+        player.id, player.bank, offset = _unpackPerson(player, data, offset, version)
+        if seat < len(policies):
+            player.policy = policies[seat]
+        if game.playerBust(player.hand.bust):
+            game.table.markBust(seat)
+        elif player.hand.surrendered:
+            game.table.markSurrendered(seat)
+    return game
+
+
+def saveSnapshot(game, path):
+    """Writes a snapshot of a game to a file."""
+    with open(path, 'wb') as f:
+        f.write(snapshot(game))
+
+
+def loadSnapshot(path, game=None):
+    """Restores a game from a snapshot file, see restore."""
+    with open(path, 'rb') as f:
+        return restore(f.read(), game)
@@ -0,0 +1,268 @@
+import numpy as np
+from actions import STAND, HIT, DOUBLE, SURRENDER, ACTION_NAMES
+from dealer_probabilities import (dealerOutcomes, drawProbabilities, removeCard,
+                                  BUST, BLACKJACK)
+from hand import VALUES
+from rules import DEFAULT_RULES
+
+
+def _allowed(code, can_double, can_surrender):
+    """Whether an action may be played, where doubling and surrendering
+       depend on the hand and the rules."""
+    return (code != DOUBLE or can_double) and (code != SURRENDER or can_surrender)
+
+
+class StrategyTable:
+    """Optimal action and expected values for every player hand against every
+       dealer upcard, indexed by value so a decision is a single lookup.
+
+       actions is indexed [soft, best total, upcard] in the same layout as the
+       batch simulator's strategy tables, and holds the better of hitting and
+       standing. two_card_actions has the same layout and holds the best
+       action of a hand's first two cards, which may also double or surrender.
+       pairs is indexed [pair card value, upcard], where an Ace has value 1.
+    """
+
+    def __init__(self, actions, pairs, evs, pair_evs, two_card_actions=None):
+        self.actions = actions
+        self.pairs = pairs
+        self.evs = evs  # [soft, total, upcard, action] EV per unit bet
+        self.pair_evs = pair_evs  # [pair value, upcard, action]
+        self.two_card_actions = actions if two_card_actions is None else two_card_actions
+
+    def lookup(self, hand_value, upcard, pair=None, can_double=False, can_surrender=False):
+        """Optimal action for a hand.
+
+        Args:
+            hand_value (HandValue): value of the player's hand.
+            upcard (int): value of the dealer's upcard, 1 (Ace) to 10.
+            pair (int, optional): the card value of the pair held, if the hand
+                                  can be split. Defaults to None.
+            can_double (bool, optional): whether the hand may double. Defaults
+                                         to False.
+            can_surrender (bool, optional): whether the hand may surrender.
+                                            Defaults to False.
+
+        Returns:
+            int: action code, see actions.py.
+        """
+        best = hand_value.best
+        if best > 21:
+            return STAND
+        if hand_value.no_cards == 1:
+            return HIT  # A pile just split draws its second card
+        if pair is not None:
+            code = self.pairs[pair, upcard]
+            if _allowed(code, can_double, can_surrender):
+                return code
+        soft = int(hand_value.soft)
+        if hand_value.no_cards == 2:
+            code = self.two_card_actions[soft, best, upcard]
+            if _allowed(code, can_double, can_surrender):
+                return code
+        return self.actions[soft, best, upcard]
+
+
+class StrategySolver:
+    """Solves the expected value of each action by memoised recursion over the
+       player's hand state and the shoe composition, against the exact dealer
+       outcome distribution.
+
+    Args:
+        composition (tuple of int, optional): card value counts of the shoe, see
+                                              dealer_probabilities.fullComposition.
+                                              Defaults to None, an infinite deck.
+        rules (RuleSet, optional): the rules played by. Defaults to the default
+                                   rules, see rules.py.
+        card_removal (bool, optional): also remove each card the player draws
+                                       while hitting from the composition. EVs
+                                       are then exact for the hand, but a full
+                                       solve takes minutes rather than under a
+                                       second. Defaults to False, where only the
+                                       upcard and the player's first two cards
+                                       are removed.
+    """
+
+    def __init__(self, composition=None, card_removal=False, rules=DEFAULT_RULES):
+        self.composition = composition
+        self.card_removal = card_removal
+        self.rules = rules
+        self._memo = {}
+
+    def standEV(self, best, upcard, composition):
+        """EV of standing on a total, per unit bet."""
+        dealer = dealerOutcomes(upcard, composition, self.rules)
+        ev = dealer[BUST]
+        for i, p in enumerate(dealer[:BUST]):
+            ev += p * ((best > 17 + i) - (best < 17 + i))
+        # With no hole card, a dealer blackjack beats every total including 21
+        ev -= dealer[BLACKJACK]
+        return ev
+
+    def hitEV(self, hard, ace, upcard, composition):
+        """EV of taking one card and then playing on optimally, per unit bet."""
+        ev = 0.0
+        for value, p in drawProbabilities(composition):
+            new_hard = hard + value
+            if new_hard > 21:
+                ev -= p
+                continue
+            if self.card_removal:
+                next_composition = removeCard(composition, value)
+            else:
+                next_composition = composition
+            ev += p * self.bestEV(new_hard, ace or value == 1, upcard, next_composition)
+        return ev
+
+    def doubleEV(self, hard, ace, upcard, composition):
+        """EV of doubling the bet and standing on the one card drawn, per unit
+           of the original bet."""
+        ev = 0.0
+        for value, p in drawProbabilities(composition):
+            new_hard = hard + value
+            if new_hard > 21:
+                ev -= p
+                continue
+            if self.card_removal:
+                next_composition = removeCard(composition, value)
+            else:
+                next_composition = composition
+            best = new_hard + 10 if (ace or value == 1) and new_hard <= 11 else new_hard
+            ev += p * self.standEV(best, upcard, next_composition)
+        return 2 * ev
+
+    def pileEV(self, value, upcard, composition):
+        """EV of one pile of a split pair, per unit of its bet. The pile starts
+           with one card of the pair and draws its second, then may double if
+           the rules allow doubling after a split, or plays on optimally."""
+        ev = 0.0
+        for second, p in drawProbabilities(composition):
+            hard = value + second
+            ace = value == 1 or second == 1
+            if self.card_removal:
+                next_composition = removeCard(composition, second)
+            else:
+                next_composition = composition
+            pile_ev = self.bestEV(hard, ace, upcard, next_composition)
+            soft = ace and hard <= 11
+            if self.rules.can_double[1][soft][hard + 10 if soft else hard]:
+                pile_ev = max(pile_ev, self.doubleEV(hard, ace, upcard, next_composition))
+            ev += p * pile_ev
+        return ev
+
+    def bestEV(self, hard, ace, upcard, composition):
+        """EV of the best of hitting and standing on a hand."""
+        key = (hard, ace, upcard, composition)
+        if key not in self._memo:
+            best = hard + 10 if ace and hard <= 11 else hard
+            ev = self.standEV(best, upcard, composition)
+            if best < 21:
+                ev = max(ev, self.hitEV(hard, ace, upcard, composition))
+            self._memo[key] = ev
+        return self._memo[key]
+
+    def _remove(self, values):
+        composition = self.composition
+        for value in values:
+            composition = removeCard(composition, value)
+        return composition
+
+    def handEVs(self, values, upcard, can_split=None):
+        """EV of each action available to a hand.
+
+        Args:
+            values (list of int): card values in the player's hand, Aces as 1.
+            upcard (int): value of the dealer's upcard.
+            can_split (bool, optional): whether split is available. Defaults to
+                                        a two card hand of equal values, if the
+                                        rules allow splitting.
+
+        Returns:
+            dict {str : float}: EV per unit of the original bet for each action.
+        """
+        composition = self._remove(list(values) + [upcard])
+        hard = sum(values)
+        ace = 1 in values
+        best = hard + 10 if ace and hard <= 11 else hard
+        if len(values) == 2 and best == 21:
+            # A natural wins at the blackjack payout unless the dealer draws one too
+            numerator, denominator = self.rules.blackjack_payout
+            p_blackjack = dealerOutcomes(upcard, composition, self.rules)[BLACKJACK]
+            return {'stand': numerator / denominator * (1 - p_blackjack)}
+        evs = {'stand': self.standEV(best, upcard, composition)}
+        if best < 21:
+            evs['hit'] = self.hitEV(hard, ace, upcard, composition)
+        if len(values) == 2:
+            if self.rules.can_double[0][ace and hard <= 11][best]:
+                evs['double'] = self.doubleEV(hard, ace, upcard, composition)
+            if self.rules.surrender:
+                evs['surrender'] = -0.5
+        if can_split is None:
+            can_split = len(values) == 2 and values[0] == values[1] and \
+                self.rules.can_split[values[0]]
+        if can_split:
+            # Each split hand starts with one card and carries the original bet
+            evs['split'] = 2 * self.pileEV(values[0], upcard, composition)
+        return evs
+
+    def _representativeHand(self, soft, total):
+        """Typical two card hand making a total, used for its card removal."""
+        if soft:
+            return [1, total - 11]
+        if total >= 12:
+            return [total - 10, 10]
+        return [total // 2, total - total // 2]
+
+    def solve(self):
+        """Solves the optimal action for every hand against every upcard.
+
+        Returns:
+            StrategyTable: the solved strategy.
+        """
+        actions = np.full((2, 22, 11), STAND, dtype=np.uint8)
+        two_card_actions = np.full((2, 22, 11), STAND, dtype=np.uint8)
+        evs = np.full((2, 22, 11, len(ACTION_NAMES)), np.nan)
+        pairs = np.full((11, 11), STAND, dtype=np.uint8)
+        pair_evs = np.full((11, 11, len(ACTION_NAMES)), np.nan)
+
+        for upcard in range(1, 11):
+            # Hard totals 4-20 and soft totals 12-20, 21 always stands
+            for soft, totals in ((0, range(4, 21)), (1, range(12, 21))):
+                for total in totals:
+                    hand_evs = self.handEVs(self._representativeHand(soft, total),
+                                            upcard, can_split=False)
+                    for action, ev in hand_evs.items():
+                        evs[soft, total, upcard, ACTION_NAMES.index(action)] = ev
+                    two_card_actions[soft, total, upcard] = \
+                        ACTION_NAMES.index(max(hand_evs, key=hand_evs.get))
+                    # Hands of three or more cards can only hit or stand
+                    play = {action: hand_evs[action] for action in ('stand', 'hit')}
+                    actions[soft, total, upcard] = ACTION_NAMES.index(max(play, key=play.get))
+
+            for value in range(1, 11):
+                hand_evs = self.handEVs([value, value], upcard)
+                for action, ev in hand_evs.items():
+                    pair_evs[value, upcard, ACTION_NAMES.index(action)] = ev
+                pairs[value, upcard] = ACTION_NAMES.index(max(hand_evs, key=hand_evs.get))
+
+        return StrategyTable(actions, pairs, evs, pair_evs, two_card_actions)
+
+
+def optimalAction(game, strategy, player_id=0):
+    """Looks up the optimal action for a player's current hand in a game.
+
+    Args:
+        game (Blackjack): the game being played.
+        strategy (StrategyTable): the solved strategy to follow.
+        player_id (int, optional): the ID of the player to decide for.
+                                   Defaults to 0.
+
+    Returns:
+        str: the action to take, 'hit', 'stand', 'split', 'double' or 'surrender'.
+    """
+    hand = game.players[player_id].hand
+    upcard = VALUES[game.dealer.hand.cards[0]]
+    hand_value = game.pileValue(player_id)
+    pair = VALUES[hand.cards[0]] if game.canSplit(player_id) else None
+    return ACTION_NAMES[strategy.lookup(hand_value, upcard, pair, game.canDouble(player_id),
+                                        game.canSurrender(player_id))]
@@ -0,0 +1,44 @@
+from people import Player, Dealer
+
+
+class Table:
+    """A Blackjack table of indexed player seats and a separate dealer.
+
+       The seats whose hands are still live this round are kept in a set,
+       which is updated as each hand busts or is surrendered, so checking
+       whether every player has bust is constant time however many seats the
+       table has.
+    """
+
+    def __init__(self, no_seats=1, player_bank=1000):
+        self.dealer = Dealer()
+        self.seats = [Player(player_bank) for _ in range(no_seats)]
+        self.active_seats = set(range(no_seats))  # Seats with a hand yet to bust
+
+    def __len__(self):
+        return len(self.seats)
+
+    def __getitem__(self, seat):
+        return self.seats[seat]
+
+    def people(self):
+        """The dealer followed by each seated player."""
+        return [self.dealer] + self.seats
+
+    def markBust(self, seat):
+        """Records that every hand of a seat has bust this round."""
+        self.active_seats.discard(seat)
+
+    def markSurrendered(self, seat):
+        """Records that a seat has surrendered its hand this round."""
+        self.active_seats.discard(seat)
+
+    def allBust(self):
+        """Checks whether every seat has bust or surrendered this round."""
+        return not self.active_seats
+
+    def reset(self):
+        """Reset each persons hand and reactivate every seat for a new round."""
+        for person in self.people():
+            person.reset()
+        self.active_seats = set(range(len(self.seats)))
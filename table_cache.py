@@ -0,0 +1,271 @@
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+import numpy as np
+from dealer_probabilities import dealerTable, fullComposition
+from rules import RuleSet, RULES_VERSION, DEFAULT_RULES
+from strategy_solver import StrategySolver, StrategyTable
+
+# Version of the on-disk layout. Bump it whenever the files an entry holds or
+# the manifest format change. Entries written under another cache or rules
+# version are never read, see TableCache.
+CACHE_VERSION = 1
+
+# Each entry is a directory named after its kind and key digest, holding one
+# .npy file per table and a manifest.json of the versions it was built under,
+# the key it was built for and the SHA-256 digest of every table file.
+MANIFEST = 'manifest.json'
+STRATEGY_TABLES = ('actions', 'two_card_actions', 'pairs', 'evs', 'pair_evs')
+DEALER_TABLES = ('outcomes',)
+
+# New entries are staged in a directory named '.<entry>-<random>' before being
+# renamed into place. Staging directories older than this many seconds were
+# left by an interrupted write, and are deleted by TableCache.prune.
+STAGING_MAX_AGE = 3600
+
+
+def _fileDigest(path):
+    sha = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(1 << 16), b''):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+class TableCache:
+    """Solved strategy and dealer outcome tables kept on disk, so a process
+       opens a previously solved table rather than solving it again.
+
+       Tables are stored as .npy files and opened memory mapped read only, so
+       every process using an entry shares one physical copy through the page
+       cache. Entries are keyed by rule set, number of decks, penetration,
+       counting system and, for strategies, card removal, together with
+       RULES_VERSION and CACHE_VERSION, so a change to the rules code misses
+       the old entries and solves afresh.
+
+       Before an entry is used its manifest is checked against the key and
+       versions and each file against its SHA-256 digest. An entry that fails
+       the check is deleted and rebuilt. New entries are written to a temporary
+       directory and renamed into place, so concurrent processes never read a
+       partly written entry.
+
+    Args:
+        path (str, optional): directory holding the cache. Defaults to
+                              'table_cache'.
+        verify (bool, optional): check the digest of every file when an entry
+                                 is opened. Defaults to True.
+    """
+
+    def __init__(self, path='table_cache', verify=True):
+        self.path = path
+        self.verify = verify
+        self._open = {}  # {entry name : {table name : memory mapped array}}
+
+    @staticmethod
+    def key(rules=DEFAULT_RULES, no_decks=6, penetration=0.75, counting_system='hi-lo',
+            **extra):
+        """The key of a table, with every field in a form that serialises to JSON.
+
+        Args:
+            rules (RuleSet, optional): the rules played by. Defaults to the
+                                       default rules.
+            no_decks (int, optional): number of decks in the shoe, or None for
+                                      an infinite deck. Defaults to 6.
+            penetration (float, optional): fraction of the shoe dealt before a
+                                           reshuffle. Defaults to 0.75.
+            counting_system (str or tuple, optional): name of a system in
+                                                      hand.COUNTING_SYSTEMS, or
+                                                      a tuple of tags. Defaults
+                                                      to 'hi-lo'.
+            **extra: any further solver options that change the table.
+
+        Returns:
+            dict: the key.
+        """
+        if type(counting_system) is not str:
+            counting_system = list(counting_system)
+        return dict(rules=rules.asDict(), no_decks=no_decks, penetration=float(penetration),
+                    counting_system=counting_system, **extra)
+
+    def entryName(self, kind, key):
+        """Directory name of an entry, from a digest of its kind, key and versions."""
+        versions = {'cache_version': CACHE_VERSION, 'rules_version': RULES_VERSION}
+        text = json.dumps([kind, key, versions], sort_keys=True)
+        return f'{kind}-{hashlib.sha256(text.encode()).hexdigest()[:32]}'
+
+    def _check(self, entry, kind, key, names):
+        """Reads and checks an entry's manifest, returning it if the entry is
+           complete, intact and built for this key under the current versions."""
+        try:
+            with open(os.path.join(entry, MANIFEST)) as file:
+                manifest = json.load(file)
+        except (OSError, ValueError):
+            return None
+        if manifest.get('cache_version') != CACHE_VERSION or \
+                manifest.get('rules_version') != RULES_VERSION or \
+                manifest.get('kind') != kind or manifest.get('key') != key or \
+                sorted(manifest.get('tables', ())) != sorted(names):
+            return None
+        if self.verify:
+            for name, digest in manifest['tables'].items():
+                try:
+                    if _fileDigest(os.path.join(entry, f'{name}.npy')) != digest:
+                        return None
+                except OSError:
+                    return None
+        return manifest
+
+    def _write(self, name, kind, key, tables):
+        """Writes an entry to a temporary directory and renames it into place.
+           If another process has written the entry first, its copy is kept."""
+        os.makedirs(self.path, exist_ok=True)
+        staging = tempfile.mkdtemp(prefix=f'.{name}-', dir=self.path)
+        try:
+            digests = {}
+            for table_name, table in tables.items():
+                file_path = os.path.join(staging, f'{table_name}.npy')
+                np.save(file_path, np.ascontiguousarray(table))
+                digests[table_name] = _fileDigest(file_path)
+            manifest = {'cache_version': CACHE_VERSION, 'rules_version': RULES_VERSION,
+                        'kind': kind, 'key': key, 'tables': digests}
+            with open(os.path.join(staging, MANIFEST), 'w') as file:
+                json.dump(manifest, file, indent=2, sort_keys=True)
+            try:
+                os.rename(staging, os.path.join(self.path, name))
+            except OSError:
+                pass  # Already written by another process
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+
+    def tables(self, kind, key, names, build):
+        """Opens the tables of an entry memory mapped, building them first if
+           the entry is missing or fails its integrity check.
+
+        Args:
+            kind (str): the kind of entry, e.g. 'strategy'.
+            key (dict): the entry's key, see TableCache.key.
+            names (tuple of str): the names of the tables the entry holds.
+            build (callable): called with no arguments on a miss, and returns a
+                              dict {table name : numpy array}.
+
+        Returns:
+            dict {str : numpy memmap}: each table, read only.
+        """
+        name = self.entryName(kind, key)
+        tables = self._open.get(name)
+        if tables is not None:
+            return tables
+        entry = os.path.join(self.path, name)
+        if self._check(entry, kind, key, names) is None:
+            # Entries appear complete, by rename, so only an existing entry that
+            # fails its check is stale or corrupt. A missing entry may be being
+            # written by another process, so nothing is deleted.
+            if os.path.isdir(entry):
+                shutil.rmtree(entry, ignore_errors=True)
+            self._write(name, kind, key, build())
+            if self._check(entry, kind, key, names) is None:
+                raise OSError(f'Table cache entry {entry} could not be written.')
+        tables = {table_name: np.load(os.path.join(entry, f'{table_name}.npy'),
+                                      mmap_mode='r', allow_pickle=False)
+                  for table_name in names}
+        self._open[name] = tables
+        return tables
+
+    def dealerTable(self, rules=DEFAULT_RULES, no_decks=6, penetration=0.75,
+                    counting_system='hi-lo'):
+        """Dealer outcome distributions for every upcard from a full shoe, see
+           dealer_probabilities.dealerTable. Arguments as TableCache.key.
+
+        Returns:
+            numpy memmap (11, 7): the dealer table, read only.
+        """
+        key = self.key(rules, no_decks, penetration, counting_system)
+
+        def build():
+            composition = None if no_decks is None else fullComposition(no_decks)
+            return {'outcomes': dealerTable(composition, rules)}
+
+        return self.tables('dealer', key, DEALER_TABLES, build)['outcomes']
+
+    def strategy(self, rules=DEFAULT_RULES, no_decks=6, penetration=0.75,
+                 counting_system='hi-lo', card_removal=False):
+        """The solved strategy for a full shoe, see StrategySolver. Arguments
+           as TableCache.key, with card_removal passed on to the solver.
+
+        Returns:
+            StrategyTable: the strategy, with read only memory mapped tables.
+        """
+        key = self.key(rules, no_decks, penetration, counting_system,
+                       card_removal=card_removal)
+
+        def build():
+            composition = None if no_decks is None else fullComposition(no_decks)
+            strategy = StrategySolver(composition, card_removal, rules).solve()
+            return {name: getattr(strategy, name) for name in STRATEGY_TABLES}
+
+        tables = self.tables('strategy', key, STRATEGY_TABLES, build)
+        return StrategyTable(tables['actions'], tables['pairs'], tables['evs'],
+                             tables['pair_evs'], tables['two_card_actions'])
+
+    def prune(self):
+        """Deletes every entry not built under the current cache and rules
+           versions, along with any staging directory left behind by an
+           interrupted write. Staging directories younger than
+           STAGING_MAX_AGE may belong to a live writer and are kept.
+
+        Returns:
+            int: number of entries deleted.
+        """
+        if not os.path.isdir(self.path):
+            return 0
+        removed = 0
+        for name in os.listdir(self.path):
+            entry = os.path.join(self.path, name)
+            if not os.path.isdir(entry):
+                continue
+            if name.startswith('.'):
+                try:
+                    stale = time.time() - os.path.getmtime(entry) > STAGING_MAX_AGE
+                except OSError:
+                    continue  # Renamed into place or removed by its writer
+                if stale:
+                    shutil.rmtree(entry, ignore_errors=True)
+                    removed += 1
+                continue
+            try:
+                with open(os.path.join(entry, MANIFEST)) as file:
+                    manifest = json.load(file)
+                current = manifest.get('cache_version') == CACHE_VERSION and \
+                    manifest.get('rules_version') == RULES_VERSION
+            except (OSError, ValueError):
+                current = False
+            if not current:
+                shutil.rmtree(entry, ignore_errors=True)
+                removed += 1
+        return removed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Solve and cache strategy and dealer tables.')
+    parser.add_argument('--path', default='table_cache')
+    parser.add_argument('--decks', type=int, default=6)
+    parser.add_argument('--penetration', type=float, default=0.75)
+    parser.add_argument('--counting-system', default='hi-lo')
+    parser.add_argument('--h17', action='store_true')
+    parser.add_argument('--surrender', action='store_true')
+    parser.add_argument('--card-removal', action='store_true')
+    parser.add_argument('--prune', action='store_true')
+    args = parser.parse_args()
+
+    cache = TableCache(args.path)
+    if args.prune:
+        print(f'Pruned {cache.prune()} stale entries')
+    rules = RuleSet(hits_soft_17=args.h17, surrender=args.surrender)
+    options = (rules, args.decks, args.penetration, args.counting_system)
+    cache.dealerTable(*options)
+    cache.strategy(*options, card_removal=args.card_removal)
+    print(f'Cached tables for {rules}')
@@ -0,0 +1,10 @@
+import numpy as np
+from bankroll import OutcomeDistribution
+
+
+def testBatchSimulationPaysNaturals():
+    outcomes = OutcomeDistribution.fromBatchSimulation(rounds=100000,
+                                                       rng=np.random.default_rng(0))
+    assert 1.5 in outcomes.values.tolist()
+    assert set(outcomes.values.tolist()) <= {-2.0, -1.0, 0.0, 1.0, 1.5, 2.0}
+    assert -0.04 < outcomes.mean < 0.0
@@ -0,0 +1,19 @@
+import numpy as np
+import pytest
+from batch_simulator import BatchSimulator, RANK_VALUES, basicStrategyTable, mimicDealerTable
+from headless_blackjack import HeadlessBlackjack
+from policies import TablePolicy
+
+
+@pytest.mark.parametrize('table', [mimicDealerTable(), basicStrategyTable()])
+def testBatchAgreesWithObjectEngine(table):
+    ranks = np.random.default_rng(1).integers(13, size=(2000, 24))
+    winnings = BatchSimulator(table).play(RANK_VALUES[ranks])['winnings']
+    game = HeadlessBlackjack(player_bank=10**9)
+    game.players[0].policy = TablePolicy(table)
+    for shoe, won in zip(ranks, winnings):
+        cards = iter(shoe)
+        game.deck.draw = lambda cards=cards: int(next(cards)) * 4
+        bank = game.players[0].bank
+        game.playRound(2)
+        assert game.players[0].bank - bank == won
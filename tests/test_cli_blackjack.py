@@ -0,0 +1,47 @@
+from cli_blackjack import Blackjack
+from hand import RANKS
+
+
+def dealt(ranks, bet, bank):
+    """A one player game with the dealer's upcard and the player's two cards
+       dealt in order from ranks, and the player's whole bank bet but bank."""
+    game = Blackjack(player_bank=bet + bank, verbose=False)
+    cards = iter([RANKS.index(rank) * 4 for rank in ranks])
+    game.deck.draw = lambda: next(cards)
+    game.personDraws(dealer=True)
+    game.personDraws(times=2)
+    game.placeBet(bet)
+    return game
+
+
+def testSplitWithInsufficientBank():
+    game = dealt(['7', '8', '8'], bet=10, bank=4)
+    hand = game.players[0].hand
+    assert not game.canSplit()
+    assert not game.split()
+    assert (hand.split, hand.bet, game.players[0].bank) == (False, 10, 4)
+    assert len(hand.cards) == 2
+
+
+def testSplitWithSufficientBank():
+    game = dealt(['7', '8', '8'], bet=10, bank=10)
+    assert game.split()
+    assert (game.players[0].hand.bet, game.players[0].bank) == (20, 0)
+
+
+def testDoubleWithInsufficientBank():
+    game = dealt(['7', '5', '6'], bet=10, bank=0)
+    hand = game.players[0].hand
+    assert not game.canDouble()
+    assert not game.double()
+    assert (hand.doubled, hand.bet, game.players[0].bank) == (False, 10, 0)
+    assert len(hand.cards) == 2
+
+
+def testDoubleSplitPileWithInsufficientBank():
+    game = dealt(['7', '8', '8'], bet=10, bank=10)
+    game.split()
+    hand = game.players[0].hand
+    assert not game.double()
+    assert (hand.doubled, hand.bet, game.players[0].bank) == ((False, False), 20, 0)
+    assert hand.cards == [[RANKS.index('8') * 4], [RANKS.index('8') * 4]]
@@ -0,0 +1,32 @@
+import json
+import numpy as np
+from hand_history import RingBufferSink, JSONLSink, BinarySink, readBinary
+from headless_blackjack import HeadlessBlackjack
+
+
+def testSinksRecordTheSameEvents(tmp_path):
+    game = HeadlessBlackjack(2, 1000, rng=np.random.default_rng(3))
+    ring = RingBufferSink(100000)
+    sinks = [JSONLSink(tmp_path / 'hands.jsonl'),
+             BinarySink(tmp_path / 'hands.bin', batch_size=100)]
+    game.event_sinks += [ring] + sinks
+    for _ in range(300):
+        game.playRound(2)
+    for sink in sinks:
+        sink.close()
+    events = ring.events()
+    assert events[0].kind == 'deal' and events[-1].kind == 'settle'
+    assert list(readBinary(tmp_path / 'hands.bin')) == events
+    with open(tmp_path / 'hands.jsonl') as file:
+        assert [json.loads(line) for line in file] == [event._asdict() for event in events]
+
+
+def testSettlementsAccountForBanks():
+    game = HeadlessBlackjack(2, 1000, rng=np.random.default_rng(4))
+    ring = RingBufferSink(100000)
+    game.event_sinks.append(ring)
+    for _ in range(300):
+        game.playRound(2)
+    net = sum(event.amount if event.kind == 'settle' else -event.amount
+              for event in ring.events() if event.kind in ('bet', 'settle'))
+    assert net == sum(player.bank for player in game.players) - 2000
@@ -0,0 +1,38 @@
+import os
+import subprocess
+import sys
+import numpy as np
+from headless_blackjack import HeadlessBlackjack
+from instrumentation import Instrumentation
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def testCountersFollowRoundsAndCards():
+    game = HeadlessBlackjack(rng=np.random.default_rng(0))
+    instrumentation = Instrumentation()
+    instrumentation.enable()
+    try:
+        game.simulate(50)
+        counters = instrumentation.snapshot()['counters']
+    finally:
+        instrumentation.disable()
+    assert counters['rounds'] == 50
+    assert counters['cards_dealt'] >= 150  # At least a dealer card and two each round
+    assert instrumentation.snapshot()['timings']['Deck.draw']['calls'] == counters['cards_dealt']
+
+
+def testGUIInstrumentedWhenImportedLater():
+    # Run in a fresh interpreter, where the GUI has not been imported yet
+    script = ('import os, sys\n'
+              "os.environ['SDL_VIDEODRIVER'] = 'dummy'\n"
+              'from instrumentation import Instrumentation\n'
+              'instrumentation = Instrumentation()\n'
+              'instrumentation.enable()\n'
+              "assert 'blackjack' not in sys.modules\n"
+              'from blackjack import GUIBlackjack\n'
+              "assert hasattr(GUIBlackjack.display, '__wrapped__')\n"
+              "assert 'GUIBlackjack.display' in instrumentation.histograms\n"
+              'instrumentation.disable()\n'
+              "assert not hasattr(GUIBlackjack.display, '__wrapped__')\n")
+    subprocess.run([sys.executable, '-c', script], cwd=ROOT, check=True)
@@ -0,0 +1,14 @@
+from dealer_probabilities import fullComposition
+from parallel_simulator import runParallel
+from policies import TablePolicy
+from strategy_solver import StrategySolver
+
+
+def testResultsIndependentOfWorkerCount():
+    # A solved strategy doubles and splits, which a limited bank would prevent
+    policy = TablePolicy(StrategySolver(fullComposition(6)).solve())
+    one, seed = runParallel(3000, workers=1, seed=7, decide=policy, chunk_rounds=500)
+    many, _ = runParallel(3000, workers=3, seed=7, decide=policy, chunk_rounds=500)
+    assert seed == 7
+    assert one == many
+    assert one.rounds == 3000
@@ -0,0 +1,32 @@
+import numpy as np
+from dealer_probabilities import fullComposition
+from hand import RANKS
+from headless_blackjack import HeadlessBlackjack
+from policies import HandView, TablePolicy
+from strategy_solver import StrategySolver, optimalAction
+
+STRATEGY = StrategySolver(fullComposition(6)).solve()
+
+
+def rigged(ranks):
+    game = HeadlessBlackjack(rng=np.random.default_rng(0))
+    cards = iter([RANKS.index(rank) * 4 for rank in ranks])
+    game.deck.draw = lambda: next(cards)
+    return game
+
+
+def testSplitPilesDrawTheirSecondCard():
+    # Dealer 6, player A A, then each pile draws a 9
+    for policy in (TablePolicy(STRATEGY), lambda game, i: optimalAction(game, STRATEGY, i)):
+        game = rigged(['6', 'A', 'A', '9', '9', '10', '10'])
+        result = game.playRound(2, policy)
+        assert result.players[0].hand_value == (20, 20)
+
+
+def testBatchDecisionHitsOneCardPile():
+    game = rigged(['6', 'A', 'A'])
+    game.personDraws(dealer=True)
+    game.personDraws(times=2)
+    game.placeBet(2)
+    game.split()
+    assert TablePolicy(STRATEGY).decideBatch([HandView(game, 0)]) == ['hit']
@@ -0,0 +1,52 @@
+import numpy as np
+from headless_blackjack import HeadlessBlackjack
+from policies import TablePolicy
+from replay import SessionRecorder, Replayer
+from snapshot import snapshot, restore
+from strategy_solver import StrategySolver
+
+
+def randomDecisions(seed):
+    """A decide function choosing randomly, splitting pairs half the time."""
+    choice = np.random.default_rng(seed)
+
+    def decide(game, player_id):
+        if not game.players[player_id].hand.split and game.canSplit(player_id) and \
+                choice.random() < 0.5:
+            return 'split'
+        return 'hit' if choice.random() < 0.4 else 'stand'
+
+    return decide
+
+
+def recordedSession(rounds):
+    """Records a three player session with random bets and decisions, returning
+       the log and the result of every round."""
+    game = HeadlessBlackjack(3, 10**6, rng=np.random.default_rng(42))
+    decide = randomDecisions(9)
+    bets = np.random.default_rng(7)
+    for _ in range(10):
+        game.playRound(2, decide)
+    recorder = SessionRecorder(game, seed=42)
+    results = [game.playRound([2 * int(bet) for bet in bets.integers(1, 5, 3)], decide)
+               for _ in range(rounds)]
+    return recorder.asDict(), results
+
+
+def testReplayAndSeekReproduceSession():
+    log, results = recordedSession(600)
+    replayer = Replayer(log, keyframe_interval=100)
+    assert replayer.run() == results
+    for position in (450, 123, 599, 0, 300, 301):
+        replayer.seek(position)
+        assert replayer.playRound() == results[position]
+
+
+def testRestoreKeepsPolicies():
+    policy = TablePolicy(StrategySolver().solve())
+    game = HeadlessBlackjack(3, rng=np.random.default_rng(3))
+    game.players[1].policy = policy
+    data = snapshot(game)
+    game.playRound(2)
+    restore(data, game)
+    assert [player.policy for player in game.players] == [None, policy, None]
@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+from batch_simulator import BatchSimulator, dealShoes
+from dealer_probabilities import fullComposition
+from headless_blackjack import HeadlessBlackjack
+from policies import TablePolicy
+from rules import RuleSet, DEFAULT_RULES
+from settlement import settle, settleHand, NATURAL, SURRENDERED
+from strategy_solver import StrategySolver
+
+
+def testNaturalPaysThreeToTwo():
+    assert settleHand(21, False, True, 2, 20, False, False) == (5, NATURAL)
+    assert settleHand(21, False, True, 10, 20, False, False, (6, 5)) == (22, NATURAL)
+
+
+def testSurrenderReturnsHalf():
+    assert settleHand(16, False, False, 2, 20, False, False, surrendered=True) == \
+        (1, SURRENDERED)
+
+
+def testUnpayableBetsRaise():
+    with pytest.raises(ValueError):
+        settleHand(21, False, True, 1, 20, False, False)
+    with pytest.raises(ValueError):
+        settleHand(16, False, False, 1, 20, False, False, surrendered=True)
+    with pytest.raises(ValueError):
+        settle([21, 21], [False, False], [True, True], [2, 3], 20, False, False)
+
+
+def testBetUnit():
+    assert DEFAULT_RULES.bet_unit == 2
+    assert RuleSet(blackjack_payout=(6, 5)).bet_unit == 5
+    assert RuleSet(blackjack_payout=(6, 5), surrender=True).bet_unit == 10
+    assert RuleSet(blackjack_payout=(1, 1)).bet_unit == 1
+
+
+def testOddBetsRejected():
+    with pytest.raises(ValueError):
+        BatchSimulator(bet=1)
+    with pytest.raises(ValueError):
+        HeadlessBlackjack(rng=np.random.default_rng(0)).playRound(1)
+
+
+def testBatchEVIndependentOfBet():
+    shoes = dealShoes(20000, rng=np.random.default_rng(1))
+    unit = BatchSimulator().play(shoes)
+    large = BatchSimulator(bet=100).play(shoes)
+    assert np.array_equal(unit['winnings'] * 50, large['winnings'])
+    assert (unit['winnings'] == 3).any()  # Naturals are paid 3:2 at the default bet
+
+
+def testHeadlessEVIndependentOfBet():
+    rules = RuleSet(surrender=True)
+    policy = TablePolicy(StrategySolver(fullComposition(6), rules=rules).solve())
+    nets = []
+    for bet in (rules.bet_unit, 100):
+        game = HeadlessBlackjack(player_bank=1000 * bet, rng=np.random.default_rng(2),
+                                 rules=rules)
+        game.players[0].policy = policy
+        nets.append(game.simulate(2000, bet)['net'] / bet)
+    assert nets[0] == nets[1]
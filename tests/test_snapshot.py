@@ -0,0 +1,33 @@
+import numpy as np
+from cli_blackjack import Blackjack
+from headless_blackjack import HeadlessBlackjack
+from rules import RuleSet
+from snapshot import snapshot, restore
+
+
+def testRestoredGamePlaysOnIdentically():
+    rules = RuleSet(hits_soft_17=True, surrender=True)
+    game = HeadlessBlackjack(3, 1000, rng=np.random.default_rng(5), rules=rules)
+    for _ in range(137):
+        game.playRound(2)
+    data = snapshot(game)
+    restored = restore(data, HeadlessBlackjack(1))
+    assert (restored.round_count, restored.rules) == (game.round_count, rules)
+    assert snapshot(restored) == data
+    for _ in range(500):
+        assert restored.playRound(2) == game.playRound(2)
+
+
+def testRoundTripMidSplit():
+    game = Blackjack(2, verbose=False, rng=np.random.default_rng(1))
+    game.personDraws(dealer=True)
+    game.personDraws(player_id=0, times=2)
+    game.players[0].placeBet(10)
+    hand = game.players[0].hand
+    hand.cards = [hand.cards[0]] * 2
+    hand.calcHandValue()
+    game.split(0)
+    game.personDraws(player_id=0, side='left')
+    restored = restore(snapshot(game))
+    assert str(restored) == str(game)
+    assert snapshot(restored) == snapshot(game)
@@ -0,0 +1,45 @@
+import json
+import os
+import time
+import numpy as np
+from dealer_probabilities import dealerTable, fullComposition
+from table_cache import TableCache, STAGING_MAX_AGE
+
+
+def testDealerTableCachedAndMemoryMapped(tmp_path):
+    table = TableCache(str(tmp_path)).dealerTable(no_decks=1)
+    assert np.array_equal(table, dealerTable(fullComposition(1)))
+    reopened = TableCache(str(tmp_path)).dealerTable(no_decks=1)
+    assert isinstance(reopened, np.memmap)
+    assert np.array_equal(reopened, table)
+
+
+def testCorruptEntryRebuilt(tmp_path):
+    cache = TableCache(str(tmp_path))
+    table = np.array(cache.dealerTable(no_decks=1))
+    entry, = os.listdir(tmp_path)
+    with open(os.path.join(tmp_path, entry, 'outcomes.npy'), 'r+b') as file:
+        file.seek(-8, os.SEEK_END)
+        file.write(b'\xff' * 8)
+    assert np.array_equal(TableCache(str(tmp_path)).dealerTable(no_decks=1), table)
+
+
+def testPruneKeepsLiveStagingDirectories(tmp_path):
+    cache = TableCache(str(tmp_path))
+    cache.dealerTable(no_decks=1)
+    entry, = os.listdir(tmp_path)
+    manifest_path = os.path.join(tmp_path, entry, 'manifest.json')
+    with open(manifest_path) as file:
+        manifest = json.load(file)
+    manifest['rules_version'] = -1  # Built by an older version of the rules code
+    with open(manifest_path, 'w') as file:
+        json.dump(manifest, file)
+    live = tmp_path / '.dealer-live'
+    stale = tmp_path / '.dealer-stale'
+    live.mkdir()
+    stale.mkdir()
+    old = time.time() - STAGING_MAX_AGE - 60
+    os.utime(stale, (old, old))
+
+    assert cache.prune() == 2
+    assert os.listdir(tmp_path) == ['.dealer-live']